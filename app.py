@@ -1,13 +1,42 @@
 import streamlit as st
-from datetime import date, datetime
-from calculator import CompensationCalculator
-import random
-from pdf_generator import CompensationPDFGenerator
-import os
+from datetime import date
+from instrumentation import trace
+from pdf_job_view import show_pdf_job
+from resources import get_audit_logger, get_calculator, get_claim_store, get_pdf_job_queue, warm_start
 
-def generate_registration_number():
-    """7桁のランダムな登録番号を生成"""
-    return str(random.randint(1000000, 9999999))
+def log_changed_fields(previous_data, input_data):
+    """前回の計算時から変更された入力項目を監査ログに記録"""
+    logger = get_audit_logger()
+    for section, fields in input_data.items():
+        previous_fields = (previous_data or {}).get(section) or {}
+        for field, value in fields.items():
+            if previous_data is None or previous_fields.get(field) != value:
+                logger.log(field, value)
+
+def show_diagnostics():
+    """直近の処理の段階別所要時間を表示（URL に ?debug=1、メモリも計測する場合は ?debug=memory）"""
+    if not st.query_params.get("debug") or not st.session_state.diagnostics:
+        return
+    with st.expander("診断情報"):
+        for label, record in st.session_state.diagnostics.items():
+            summary = f"{label}: {record['total'] * 1000:.1f} ms"
+            if record["memory_peak"] is not None:
+                summary += f"（メモリ使用量のピーク {record['memory_peak'] / 1024:.0f} KiB）"
+            st.caption(summary)
+            st.table([
+                {"段階": name, "回数": span["count"], "時間（ms）": round(span["seconds"] * 1000, 2)}
+                for name, span in record["spans"].items()
+            ])
+
+def collect_startup_diagnostics():
+    """起動時の準備の所要時間を診断情報に加える（PDFワーカーは準備が済んだもののみ）"""
+    startup = warm_start()
+    if startup is None:
+        return
+    st.session_state.diagnostics["起動"] = startup["trace"]
+    for number, worker in enumerate(startup["workers"], 1):
+        if worker.done() and worker.exception() is None and worker.result() is not None:
+            st.session_state.diagnostics[f"PDFワーカーの起動（{number}）"] = worker.result()
 
 def main():
     # セッション状態の初期化
@@ -19,6 +48,12 @@ def main():
         st.session_state.reg_number = None
     if 'input_data' not in st.session_state:
         st.session_state.input_data = None
+    if 'pdf_job_id' not in st.session_state:
+        st.session_state.pdf_job_id = None
+    if 'diagnostics' not in st.session_state:
+        st.session_state.diagnostics = {}
+    measure_memory = st.query_params.get("debug") == "memory"
+    collect_startup_diagnostics()
 
     st.title("損害賠償額計算システム")
 
@@ -206,15 +241,21 @@ def main():
             }
         }
         
+        log_changed_fields(st.session_state.input_data, input_data)
         st.session_state.input_data = input_data
-        calculator = CompensationCalculator()
-        st.session_state.results = calculator.calculate_compensation(input_data)
+        calculator = get_calculator()
+        with trace("計算", memory=measure_memory) as calculation_trace:
+            st.session_state.results = calculator.calculate_compensation(input_data)
+        st.session_state.diagnostics["計算"] = calculation_trace.as_dict()
 
     # 計算結果の表示
     if st.session_state.results is not None:
         if st.button("登録"):
+            st.session_state.reg_number = get_claim_store().register(
+                st.session_state.input_data,
+                st.session_state.results
+            )
             st.session_state.registered = True
-            st.session_state.reg_number = generate_registration_number()
             
         if st.session_state.registered:
             st.success(f"登録されました。登録番号は{st.session_state.reg_number}です。")
@@ -226,27 +267,65 @@ def main():
             else:
                 st.metric(label=item, value=str(amount))
 
-        # PDF生成ボタンを追加
+        # 感応度分析（等級×今後の治療予定期間ごとの合計額）
+        with st.expander("感応度分析"):
+            sweep_grades = st.multiselect(
+                "後遺障害等級（比較）",
+                [f"{i}級" for i in range(1, 15)],
+                default=["12級", "14級"]
+            )
+            sweep_years = st.multiselect(
+                "今後の治療予定期間（年・比較）",
+                list(range(0, 11)),
+                default=[0, 1, 2, 3]
+            )
+            sweep_rate = st.radio(
+                "割引率",
+                [0.05, 0.03],
+                format_func=lambda rate: f"{rate:.0%}",
+                horizontal=True
+            )
+            if sweep_grades and sweep_years:
+                calculator = get_calculator()
+                grid = calculator.sweep(
+                    st.session_state.input_data,
+                    {"後遺障害等級": sweep_grades, "今後の治療予定期間": sweep_years, "割引率": [sweep_rate]}
+                )
+                table = grid.pivot(index="後遺障害等級", columns="今後の治療予定期間", values="合計額")
+                st.dataframe(table.loc[sweep_grades].style.format("¥{:,}"))
+
+        # 目標額からの逆算（合計額が目標額になる入力値）
+        with st.expander("目標額からの逆算"):
+            solve_field = st.selectbox(
+                "逆算する項目",
+                ["基本給", "諸手当", "医療費合計", "今後の予想医療費", "今後の治療予定期間", "通院交通費合計"]
+            )
+            solve_target = st.number_input(
+                "目標とする合計額（円）",
+                min_value=0,
+                value=st.session_state.results["合計額"],
+                step=100000
+            )
+            try:
+                solution = get_calculator().solve(st.session_state.input_data, solve_field, solve_target)
+                st.metric(label=f"{solve_field}", value=f"{solution['値']:,.2f}")
+                st.caption(f"このときの合計額: ¥{solution['結果']:,}")
+            except ValueError as e:
+                st.warning(str(e))
+
+        # PDF生成ボタンを追加（生成はバックグラウンドのワーカーで行う）
         if st.button("賠償責任額のご案内をPDF出力"):
-            pdf_generator = CompensationPDFGenerator()
-            pdf_path = f"compensation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            pdf_generator.generate_pdf(
+            st.session_state.pdf_job_id = get_pdf_job_queue().submit(
                 st.session_state.results, 
-                st.session_state.input_data, 
-                pdf_path
+                st.session_state.input_data,
+                memory=measure_memory,
+                calculator=get_calculator()
             )
-            
-            # PDFファイルをダウンロード可能にする
-            with open(pdf_path, "rb") as pdf_file:
-                pdf_bytes = pdf_file.read()
-            st.download_button(
-                label="PDFをダウンロード",
-                data=pdf_bytes,
-                file_name=pdf_path,
-                mime="application/pdf"
-            )
-            # 一時ファイルを削除
-            os.remove(pdf_path)
+        
+        if st.session_state.pdf_job_id is not None:
+            show_pdf_job(st.session_state.diagnostics)
+
+    show_diagnostics()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
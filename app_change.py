@@ -1,49 +1,24 @@
 import streamlit as st
 from datetime import date
-from calculator import CompensationCalculator
-import random
-from pdf_generator import CompensationPDFGenerator
-from datetime import datetime
-import os
-
-def get_sample_data(reg_number):
-    """登録番号に基づいてデータを取得（サンプル）"""
-    return {
-        "基本情報": {
-            "生年月日": date(1980, 6, 15),
-            "事故日": date(2023, 8, 1),
-            "性別": "男性",
-            "事故時年齢": 43,
-            "扶養家族あり": True
-        },
-        "職業情報": {
-            "雇用形態": "会社員",
-            "職種区分": "一般",
-            "勤続年数": 15,
-            "会社規模": "大企業（500人以上）"
-        },
-        "収入情報": {
-            "基本給": 45,
-            "諸手当": 8,
-            "賞与": 150,
-            "時間外手当": 5,
-            "その他収入": 20,
-            "前年度年収": 650,
-            "直近3年平均年収": 630
-        },
-        "治療情報": {
-            "入院日数": 120,
-            "通院日数": 80,
-            "医療費合計": 2500000,
-            "通院交通費合計": 160000,
-            "今後の予想医療費": 500000,
-            "今後の治療予定期間": 2,
-            "看護費用": 300000,
-            "その他医療関連費用": 100000
-        }
-    }
+from resources import get_calculator, get_claim_store, get_pdf_job_queue, warm_start
+from pdf_job_view import show_pdf_job
+
+def load_claim(reg_number):
+    """登録番号に基づいて保存済みのデータを取得（該当がなければ None）"""
+    record = get_claim_store().get(reg_number)
+    if record is None:
+        return None
+
+    data = record["input_data"]
+    # 日付は date_input で扱えるよう date 型に戻す
+    for key in ("生年月日", "事故日"):
+        data["基本情報"][key] = date.fromisoformat(data["基本情報"][key])
+    return data
 
 def main():
+    # 計算機とPDFワーカーの準備（サーバープロセスで1回のみ）
+    warm_start()
+
     # セッション状態の初期化
     if 'results' not in st.session_state:
         st.session_state.results = None
@@ -53,6 +28,10 @@ def main():
         st.session_state.current_data = None
     if 'input_data' not in st.session_state:
         st.session_state.input_data = None
+    if 'loaded_reg_number' not in st.session_state:
+        st.session_state.loaded_reg_number = None
+    if 'pdf_job_id' not in st.session_state:
+        st.session_state.pdf_job_id = None
 
     st.title("損害賠償額計算システム（確認・修正）")
 
@@ -61,9 +40,14 @@ def main():
     
     if st.button("検索"):
         if len(reg_number) == 7 and reg_number.isdigit():
-            st.success("検索成功！")
-            st.session_state.current_data = get_sample_data(reg_number)
-            st.session_state.data_loaded = True
+            data = load_claim(reg_number)
+            if data is None:
+                st.error("該当する登録データがありません")
+            else:
+                st.success("検索成功！")
+                st.session_state.current_data = data
+                st.session_state.loaded_reg_number = reg_number
+                st.session_state.data_loaded = True
         else:
             st.error("正しい登録番号を入力してください")
 
@@ -175,13 +159,22 @@ def main():
                 }
             }
 
+            # 画面で扱っていないセクション（後遺障害情報など）は登録済みの内容を引き継いで計算する
+            for section, values in data.items():
+                input_data.setdefault(section, values)
+
             st.session_state.input_data = input_data  # ここで保存
-            calculator = CompensationCalculator()
+            calculator = get_calculator()
             st.session_state.results = calculator.calculate_compensation(input_data)
 
         # 計算結果の表示
         if st.session_state.results is not None:
             if st.button("更新"):
+                get_claim_store().update(
+                    st.session_state.loaded_reg_number,
+                    st.session_state.input_data,
+                    st.session_state.results
+                )
                 st.success("データが更新されました！")
             
             st.subheader("計算結果")
@@ -191,27 +184,16 @@ def main():
                 else:
                     st.metric(label=item, value=str(amount))
 
-            # PDF生成ボタン
+            # PDF生成ボタン（生成はバックグラウンドのワーカーで行う）
             if st.button("賠償責任額のご案内をPDF出力"):
-                pdf_generator = CompensationPDFGenerator()
-                pdf_path = f"compensation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-                
-                pdf_generator.generate_pdf(
+                st.session_state.pdf_job_id = get_pdf_job_queue().submit(
                     st.session_state.results,
                     st.session_state.input_data,
-                    pdf_path
+                    calculator=get_calculator()
                 )
-                
-                with open(pdf_path, "rb") as pdf_file:
-                    pdf_bytes = pdf_file.read()
-                st.download_button(
-                    label="PDFをダウンロード",
-                    data=pdf_bytes,
-                    file_name=pdf_path,
-                    mime="application/pdf"
-                )
-                
-                os.remove(pdf_path)
+            
+            if st.session_state.pdf_job_id is not None:
+                show_pdf_job()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""入力変更の監査ログ（追記専用の JSONL セグメント）
+
+使い方（既存の input_log.json の変換）:
+    python -m audit_log convert input_log.json --dir audit_log
+"""
+import argparse
+import atexit
+from datetime import datetime
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+
+DEFAULT_LOG_DIR = os.environ.get("SEKISAN_AUDIT_LOG_DIR", "audit_log")
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class AuditLogger:
+    """入力項目の変更（field, value, timestamp）を記録するロガー
+
+    記録はバックグラウンドのスレッドでまとめて書き込み、各セグメントは追記のみ行う。
+    セグメントがサイズ上限を超えたら次のセグメントに切り替える。
+    セグメント名にプロセスIDを含めるため、複数プロセスから同じディレクトリに書き込める。
+    各セグメントには期間と項目名の索引（.idx.json）を併置し、検索時の読み込み範囲を絞る。
+    """
+
+    def __init__(self, directory=DEFAULT_LOG_DIR, max_segment_bytes=8 * 1024 * 1024,
+                 flush_interval=1.0, batch_size=500):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue = queue.Queue()
+        self._segment_number = 0
+        self._segment_path = None
+        self._segment_index = None
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def log(self, field, value, timestamp=None, **extra):
+        """変更を1件記録（書き込みはバックグラウンドで行う）"""
+        if self._closed:
+            raise RuntimeError("監査ログは既に閉じられています")
+        record = {"field": field, "value": value, **extra}
+        record["timestamp"] = timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
+        self._queue.put(record)
+
+    def flush(self):
+        """記録待ちのログを書き込むまで待機"""
+        self._queue.join()
+
+    def close(self):
+        """記録待ちのログを書き込んでから停止"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [record for record in batch if record is not None]
+            stopping = len(records) < len(batch)
+            try:
+                if records:
+                    self._write(records)
+            except Exception as e:
+                print(f"監査ログの書き込みエラー: {e}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _open_segment(self):
+        """新しいセグメントに切り替える"""
+        self._segment_number += 1
+        name = f"segment-{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{self._segment_number:04d}"
+        self._segment_path = os.path.join(self.directory, f"{name}.jsonl")
+        self._segment_index = {"segment": f"{name}.jsonl", "count": 0, "first": None, "last": None, "fields": []}
+
+    def _write(self, records):
+        if self._segment_path is None or os.path.getsize(self._segment_path) >= self.max_segment_bytes:
+            self._open_segment()
+
+        data = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records)
+        with open(self._segment_path, "a", encoding="utf-8") as f:
+            f.write(data)
+
+        index = self._segment_index
+        timestamps = [record["timestamp"] for record in records]
+        index["count"] += len(records)
+        index["first"] = min(timestamps + ([index["first"]] if index["first"] else []))
+        index["last"] = max(timestamps + ([index["last"]] if index["last"] else []))
+        index["fields"] = sorted(set(index["fields"]) | {record["field"] for record in records})
+        _write_index(self._segment_path, index)
+
+
+def _index_path(segment_path):
+    return segment_path[:-len(".jsonl")] + ".idx.json"
+
+
+def _write_index(segment_path, index):
+    """セグメントの索引を書き換える（一時ファイル経由で置き換え）"""
+    path = _index_path(segment_path)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def query(directory=DEFAULT_LOG_DIR, field=None, start=None, end=None):
+    """項目名・期間（"YYYY-MM-DD HH:MM:SS" の範囲、両端を含む）で記録を検索するジェネレータ"""
+    for index_path in sorted(glob.glob(os.path.join(directory, "segment-*.idx.json"))):
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+        if field is not None and field not in index["fields"]:
+            continue
+        if start is not None and index["last"] < start:
+            continue
+        if end is not None and index["first"] > end:
+            continue
+
+        with open(os.path.join(directory, index["segment"]), encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if field is not None and record["field"] != field:
+                    continue
+                if start is not None and record["timestamp"] < start:
+                    continue
+                if end is not None and record["timestamp"] > end:
+                    continue
+                yield record
+
+
+def convert_legacy(json_path, directory=DEFAULT_LOG_DIR):
+    """JSON 配列形式の旧ログ（input_log.json）を監査ログに変換し、変換件数を返す"""
+    with open(json_path, encoding="utf-8") as f:
+        records = json.load(f)
+
+    logger = AuditLogger(directory)
+    try:
+        for record in records:
+            record = dict(record)
+            logger.log(record.pop("field"), record.pop("value"), record.pop("timestamp", None), **record)
+    finally:
+        logger.close()
+    return len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="入力変更の監査ログ")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = subparsers.add_parser("convert", help="旧形式の input_log.json を変換")
+    convert_parser.add_argument("json_path")
+    convert_parser.add_argument("--dir", default=DEFAULT_LOG_DIR, help="監査ログの出力先ディレクトリ")
+
+    query_parser = subparsers.add_parser("query", help="記録を検索して JSONL で出力")
+    query_parser.add_argument("--dir", default=DEFAULT_LOG_DIR, help="監査ログのディレクトリ")
+    query_parser.add_argument("--field", help="項目名")
+    query_parser.add_argument("--start", help="開始日時（YYYY-MM-DD HH:MM:SS）")
+    query_parser.add_argument("--end", help="終了日時（YYYY-MM-DD HH:MM:SS）")
+
+    args = parser.parse_args(argv)
+    if args.command == "convert":
+        count = convert_legacy(args.json_path, args.dir)
+        print(f"{count}件を変換しました", file=sys.stderr)
+    else:
+        for record in query(args.dir, args.field, args.start, args.end):
+            print(json.dumps(record, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""計算処理とPDF生成のベンチマーク
+
+使い方:
+    python -m benchmark                                  # 全ケースを実行して表で表示
+    python -m benchmark --filter pdf --repeat 10         # 名前に pdf を含むケースのみ
+    python -m benchmark --json results.json              # 結果を JSON で保存
+    python -m benchmark --save-baseline baseline.json    # 基準値として保存
+    python -m benchmark --compare baseline.json --threshold 0.2
+                                                         # 基準値より 20% 以上遅いケースがあれば終了コード 1
+"""
+import argparse
+from datetime import datetime
+import functools
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+from calculator import CompensationCalculator, claims_to_frame
+
+SAMPLE_CLAIM = {
+    "基本情報": {"生年月日": "1980-06-15", "事故日": "2023-08-01", "性別": "男性", "事故時年齢": 43},
+    "職業情報": {"雇用形態": "会社員", "職種区分": "専門職"},
+    "収入情報": {"基本給": 45, "諸手当": 8, "賞与": 150, "時間外手当": 5, "直近3年平均年収": 630},
+    "治療情報": {
+        "入院日数": 120, "通院日数": 80, "医療費合計": 2500000, "通院交通費合計": 160000,
+        "今後の予想医療費": 500000, "今後の治療予定期間": 2, "看護費用": 300000, "その他医療関連費用": 100000
+    },
+    "後遺障害情報": {"後遺障害あり": True, "後遺障害等級": "12級", "障害の種類": "身体的障害"},
+}
+
+
+def sample_claims(count, seed=0):
+    """ベンチマーク用の請求データを生成（seed 固定で再現可能）"""
+    rng = random.Random(seed)
+    claims = []
+    for _ in range(count):
+        has_disability = rng.random() < 0.5
+        claims.append({
+            "基本情報": {"事故日": "2023-08-01", "性別": "男性", "事故時年齢": rng.randint(18, 70)},
+            "職業情報": {"職種区分": rng.choice(["一般", "専門職", "技能職"])},
+            "収入情報": {"基本給": rng.randint(15, 80), "諸手当": rng.randint(0, 10), "賞与": rng.choice([0, 150])},
+            "治療情報": {
+                "入院日数": rng.randint(0, 120), "通院日数": rng.randint(0, 120),
+                "医療費合計": rng.randint(0, 5000000), "通院交通費合計": rng.randint(0, 300000),
+                "今後の予想医療費": rng.choice([0, 500000]), "今後の治療予定期間": rng.randint(0, 10)
+            },
+            "後遺障害情報": {
+                "後遺障害あり": has_disability,
+                "後遺障害等級": f"{rng.randint(1, 14)}級" if has_disability else None
+            },
+        })
+    return claims
+
+
+# ケースは (名前, 回数, 計測する関数を返す関数) とし、準備（データ生成・PDF生成器の作成）は
+# 絞り込みで選ばれたケースを実行する時にのみ行う
+
+
+@functools.lru_cache(maxsize=None)
+def _calculator():
+    return CompensationCalculator()
+
+
+@functools.lru_cache(maxsize=None)
+def _sample_results():
+    return _calculator().calculate_compensation(SAMPLE_CLAIM)
+
+
+@functools.lru_cache(maxsize=None)
+def _pdf_generator(text_mode="raster", raster_color="rgb"):
+    """PDF生成器（フォントが見つからなければ ValueError）"""
+    from pdf_generator import CompensationPDFGenerator
+    return CompensationPDFGenerator(text_mode=text_mode, raster_color=raster_color)
+
+
+def _calculator_cases():
+    cases = []
+
+    for years in (10, 49):
+        cases.append((f"leibnitz_coefficient[years={years}]", 10000,
+                      lambda years=years: functools.partial(_calculator()._calculate_leibnitz_coefficient, years)))
+
+    for years in (0, 10, 100, 1000):
+        treatment_info = dict(SAMPLE_CLAIM["治療情報"], 今後の治療予定期間=years)
+        cases.append((f"treatment_cost[future_years={years}]", 1000,
+                      lambda info=treatment_info: functools.partial(_calculator()._calculate_treatment_cost, info)))
+
+    def calculate_compensation(count):
+        calculator = _calculator()
+        claims = sample_claims(count)
+        return lambda: [calculator.calculate_compensation(claim) for claim in claims]
+
+    for count in (100, 1000):
+        cases.append((f"calculate_compensation[claims={count}]", 1,
+                      functools.partial(calculate_compensation, count)))
+
+    def calculate_batch(count):
+        return functools.partial(_calculator().calculate_batch, claims_to_frame(sample_claims(count)))
+
+    for count in (1000, 100000):
+        cases.append((f"calculate_batch[claims={count}]", 1, functools.partial(calculate_batch, count)))
+    return cases
+
+
+def _pdf_cases():
+    text = "この度の事故により被られたご負傷とご不便について、心よりお見舞い申し上げます。"
+
+    def create_text_image_uncached():
+        generator = _pdf_generator()
+
+        def run():
+            generator.text_image_cache.clear()
+            generator.create_text_image(text, 12, 500, 20)
+        return run
+
+    def generate_pdf(text_mode="raster", raster_color="rgb"):
+        return functools.partial(
+            _pdf_generator(text_mode, raster_color).generate_pdf, _sample_results(), SAMPLE_CLAIM
+        )
+
+    def generate_merged_pdf(text_mode, count):
+        generator = _pdf_generator(text_mode)
+        letters = [(_sample_results(), SAMPLE_CLAIM)] * count
+        return lambda: generator.generate_merged_pdf(letters, io.BytesIO())
+
+    cases = [
+        ("create_text_image[uncached]", 10, create_text_image_uncached),
+        ("create_text_image[cached]", 1000,
+         lambda: functools.partial(_pdf_generator().create_text_image, text, 12, 500, 20)),
+    ]
+    for text_mode in ("raster", "vector"):
+        cases.append((f"generate_pdf[{text_mode}]", 5, functools.partial(generate_pdf, text_mode)))
+        for count in (10, 100):
+            cases.append((f"generate_merged_pdf[{text_mode},letters={count}]", 1,
+                          functools.partial(generate_merged_pdf, text_mode, count)))
+    for raster_color in ("gray", "bilevel"):
+        cases.append((f"generate_pdf[raster,{raster_color}]", 5,
+                      functools.partial(generate_pdf, "raster", raster_color)))
+    return cases
+
+
+def run_case(function, number, repeat):
+    """function を number 回実行する計測を repeat 回行い、1回あたりの秒数を返す"""
+    function()  # キャッシュ・遅延初期化の影響を除くため1回空実行する
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - started) / number)
+    return {"min": min(timings), "median": statistics.median(timings), "number": number, "repeat": repeat}
+
+
+def run_benchmarks(name_filter=None, repeat=5):
+    """全ケースを実行して結果（JSON で保存できる dict）を返す"""
+    results = {}
+    for name, number, factory in _calculator_cases() + _pdf_cases():
+        if name_filter and name_filter not in name:
+            continue
+        try:
+            function = factory()
+        except ValueError as e:
+            # フォントが見つからない環境などでは PDF のケースを省略する
+            print(f"{name} を省略します: {e}", file=sys.stderr)
+            continue
+        results[name] = run_case(function, number, repeat)
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.1):
+    """基準値と比較し、(ケース名, 基準値, 今回, 比率, 悪化したか) のリストを返す
+
+    中央値が基準値の (1 + threshold) 倍を超えたケースを悪化とみなす。
+    """
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = result["median"] / base["median"] if base["median"] > 0 else float("inf")
+        rows.append((name, base["median"], result["median"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def _format_seconds(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:9.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:9.2f} ms"
+    return f"{seconds:9.3f} s "
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="計算処理とPDF生成のベンチマーク")
+    parser.add_argument("--filter", help="ケース名に含まれる文字列で絞り込み")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数")
+    parser.add_argument("--json", help="結果を JSON で保存するパス（'-' で標準出力）")
+    parser.add_argument("--save-baseline", help="結果を基準値として保存するパス")
+    parser.add_argument("--compare", help="比較する基準値のパス")
+    parser.add_argument("--threshold", type=float, default=0.1, help="悪化とみなす割合（0.1 = 10%%）")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.filter, args.repeat)
+
+    for path in (args.json, args.save_baseline):
+        if path == "-":
+            json.dump(current, sys.stdout, ensure_ascii=False, indent=2)
+            print()
+        elif path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if args.json != "-":
+        for name, result in current["results"].items():
+            print(f"{name:50s} median {_format_seconds(result['median'])}  min {_format_seconds(result['min'])}")
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = 0
+    print(f"\n基準値との比較（{args.compare}、しきい値 {args.threshold:.0%}）", file=sys.stderr)
+    for name, base, value, ratio, regressed in compare(current, baseline, args.threshold):
+        regressions += regressed
+        mark = "悪化" if regressed else "  OK"
+        print(f"{mark} {name:50s} {_format_seconds(base)} -> {_format_seconds(value)} ({ratio:5.2f}x)", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""賠償責任額のご案内PDFの一括生成
+
+使い方:
+    python -m bulk_letters claims.jsonl --output letters/ --workers 8
+    python -m bulk_letters claims.csv --output letters.zip
+    python -m bulk_letters claims.jsonl --output merged.pdf --merge
+    python -m bulk_letters claims.jsonl --output merged.pdf --merge --merge-size 5000
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import re
+import sys
+import time
+import zipfile
+
+from calculator import CompensationCalculator
+from claim_io import InvalidClaim, claim_id, read_claims
+from pdf_generator import CompensationPDFGenerator
+
+# ファイル名に使える登録番号（出力先の外に書き出したり、区切り文字を含んだりしないもの）
+SAFE_NAME = re.compile(r"[0-9A-Za-z_-]+")
+
+# ワーカープロセスごとに1回だけ作成する計算機とPDF生成器
+_worker_calculator = None
+_worker_generator = None
+
+
+def _init_worker(text_mode, raster_color="rgb", raster_resolution=1):
+    """ワーカープロセスの初期化（フォントの読み込みと定型文の描画を済ませておく）"""
+    global _worker_calculator, _worker_generator
+    _worker_calculator = CompensationCalculator()
+    _worker_generator = CompensationPDFGenerator(
+        text_mode=text_mode, raster_color=raster_color, raster_resolution=raster_resolution
+    )
+    _worker_generator.warm_up()
+
+
+def _generate_letter(task):
+    """1件分の計算とPDF生成（ワーカープロセスで実行）"""
+    name, claim, error = task
+    if error is not None:
+        return name, None, error
+    try:
+        results = _worker_calculator.calculate_compensation(claim)
+        return name, _worker_generator.generate_pdf(results, claim), None
+    except Exception as e:
+        return name, None, f"{type(e).__name__}: {e}"
+
+
+def _letter_tasks(claims):
+    """(識別子, 入力データ, エラー) を順に返す
+
+    読み込めなかった行、ファイル名に使えない登録番号、重複した登録番号はエラーとする。
+    """
+    seen = set()
+    for index, claim in enumerate(claims, 1):
+        name = claim_id(claim, index)
+        if isinstance(claim, InvalidClaim):
+            yield name, None, claim.error
+        elif not SAFE_NAME.fullmatch(name):
+            yield name, None, f"登録番号に使用できない文字が含まれています: {name!r}"
+        elif name in seen:
+            yield name, None, f"登録番号が重複しています: {name}"
+        else:
+            seen.add(name)
+            yield name, claim, None
+
+
+class LetterWriter:
+    """生成したPDFをディレクトリまたはZIPファイルに順次書き出す"""
+
+    def __init__(self, output):
+        self.output = output
+        self.is_zip = output.lower().endswith(".zip")
+        if self.is_zip:
+            # PDF は内部で圧縮済みのため ZIP には無圧縮で格納する
+            self._zip = zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED)
+        else:
+            os.makedirs(output, exist_ok=True)
+
+    def write(self, name, pdf_bytes):
+        if not SAFE_NAME.fullmatch(name):
+            raise ValueError(f"ファイル名に使用できない登録番号です: {name!r}")
+        filename = f"{name}.pdf"
+        if self.is_zip:
+            self._zip.writestr(filename, pdf_bytes)
+        else:
+            with open(os.path.join(self.output, filename), "wb") as f:
+                f.write(pdf_bytes)
+
+    def close(self):
+        if self.is_zip:
+            self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def generate_letters(claims, output, workers=None, chunksize=8, text_mode="raster", progress=None,
+                     raster_color="rgb", raster_resolution=1):
+    """請求データのイテラブルからPDFを並列生成して output に書き出す
+
+    ファイル名は登録番号（英数字・"_"・"-" のみ）で、使えない文字を含む・重複する請求は失敗とする。
+    戻り値は {"succeeded": 件数, "failed": [(識別子, エラー内容), ...], "elapsed": 秒}。
+    """
+    tasks = _letter_tasks(claims)
+    succeeded = 0
+    failed = []
+    started = time.perf_counter()
+
+    with LetterWriter(output) as writer, multiprocessing.Pool(
+        processes=workers, initializer=_init_worker, initargs=(text_mode, raster_color, raster_resolution)
+    ) as pool:
+        for name, pdf_bytes, error in pool.imap_unordered(_generate_letter, tasks, chunksize=chunksize):
+            if error is None:
+                writer.write(name, pdf_bytes)
+                succeeded += 1
+            else:
+                failed.append((name, error))
+            if progress is not None:
+                progress(succeeded, len(failed))
+
+    return {"succeeded": succeeded, "failed": failed, "elapsed": time.perf_counter() - started}
+
+
+def _volume_path(output, volume):
+    """分割して書き出す場合のファイル名（merged.pdf → merged-0001.pdf）"""
+    root, extension = os.path.splitext(output)
+    return f"{root}-{volume:04d}{extension or '.pdf'}"
+
+
+def generate_merged_letters(claims, output, text_mode="raster", raster_color="rgb", raster_resolution=1,
+                            letters_per_file=None):
+    """請求データのイテラブルから全件を1つのPDFにまとめて output に書き出す（差し込み印刷用）
+
+    letters_per_file を指定すると、その件数ごとに連番を付けた別ファイル（merged-0001.pdf, ...）に分け、
+    使用メモリを1ファイル分に抑える。
+    戻り値は generate_letters と同じ形式に、書き出したファイルのリスト（files）を加えたもの。
+    読み込み・計算・描画に失敗した請求はページを作らずに失敗として記録する。
+    """
+    calculator = CompensationCalculator()
+    generator = CompensationPDFGenerator(
+        text_mode=text_mode, raster_color=raster_color, raster_resolution=raster_resolution
+    )
+    summary = {"succeeded": 0, "failed": [], "files": []}
+    started = time.perf_counter()
+
+    def letters(batch, names):
+        for index, claim in batch:
+            name = claim_id(claim, index)
+            if isinstance(claim, InvalidClaim):
+                summary["failed"].append((name, claim.error))
+                continue
+            try:
+                results = calculator.calculate_compensation(claim)
+            except Exception as e:
+                summary["failed"].append((name, f"{type(e).__name__}: {e}"))
+                continue
+            names.append(name)
+            yield results, claim
+
+    numbered = enumerate(claims, 1)
+    first = next(numbered, None)
+    while True:
+        rest = itertools.islice(numbered, letters_per_file - 1) if letters_per_file else numbered
+        batch = itertools.chain([first] if first is not None else [], rest)
+        path = _volume_path(output, len(summary["files"]) + 1) if letters_per_file else output
+
+        names = []
+        result = generator.generate_merged_pdf(letters(batch, names), path)
+        summary["succeeded"] += result["pages"]
+        summary["failed"].extend((names[position], error) for position, error in result["failed"])
+        first = next(numbered, None) if letters_per_file else None
+        if result["pages"] == 0 and letters_per_file and summary["files"]:
+            # 全件が失敗したファイルは残さない（次のファイルが同じ連番を使う）
+            os.remove(path)
+        else:
+            summary["files"].append(path)
+        if first is None:
+            break
+
+    summary["elapsed"] = time.perf_counter() - started
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="賠償責任額のご案内PDFを一括生成します")
+    parser.add_argument("input", help="請求データ（JSONL または CSV、'-' で標準入力）")
+    parser.add_argument("--output", "-o", required=True, help="出力先ディレクトリまたは .zip ファイル（--merge 時は .pdf ファイル）")
+    parser.add_argument("--merge", action="store_true", help="全件を1つのPDFにまとめて出力")
+    parser.add_argument("--merge-size", type=int, default=None,
+                        help="--merge 時に1ファイルにまとめる件数（超える分は連番を付けた別ファイルに出力）")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="入力形式（省略時は拡張子から判定）")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="ワーカープロセス数（既定: CPU数）")
+    parser.add_argument("--chunksize", type=int, default=8, help="ワーカーへ一度に渡す件数")
+    parser.add_argument("--text-mode", choices=["raster", "vector"], default="raster", help="テキストの描画方式")
+    parser.add_argument("--raster-color", choices=["rgb", "gray", "bilevel"], default="rgb",
+                        help="テキスト画像の色数（gray: グレースケール、bilevel: 白黒。保管用に小さく出力）")
+    parser.add_argument("--raster-resolution", type=float, default=1, help="テキスト画像の解像度の倍率")
+    args = parser.parse_args(argv)
+
+    def report_progress(succeeded, failed):
+        done = succeeded + failed
+        if done % 1000 == 0:
+            print(f"{done}件処理済み（失敗 {failed}件）", file=sys.stderr)
+
+    claims = read_claims(args.input, args.format, errors="yield")
+    if args.merge:
+        summary = generate_merged_letters(
+            claims,
+            args.output,
+            text_mode=args.text_mode,
+            raster_color=args.raster_color,
+            raster_resolution=args.raster_resolution,
+            letters_per_file=args.merge_size
+        )
+    else:
+        summary = generate_letters(
+            claims,
+            args.output,
+            workers=args.workers,
+            chunksize=args.chunksize,
+            text_mode=args.text_mode,
+            progress=report_progress,
+            raster_color=args.raster_color,
+            raster_resolution=args.raster_resolution
+        )
+
+    total = summary["succeeded"] + len(summary["failed"])
+    elapsed = summary["elapsed"]
+    throughput = total / elapsed if elapsed > 0 else 0
+    print(
+        f"完了: {summary['succeeded']}件成功 / {len(summary['failed'])}件失敗 "
+        f"（{elapsed:.1f}秒, {throughput:.1f}件/秒）",
+        file=sys.stderr
+    )
+    for name, error in summary["failed"]:
+        print(f"失敗: {name}: {error}", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+from collections import OrderedDict
+import contextlib
+import hashlib
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows ではプロセス間の排他を行わない
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.environ.get("SEKISAN_CACHE_DIR", "cache")
+
+
+class LRUCache:
+    """件数上限付きの LRU キャッシュ（ヒット・ミス件数を記録）
+
+    Streamlit の複数セッションから共有されるため、操作はロックで保護する。
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """値を取得（存在すれば最近使用したものとして扱う）"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """値を登録し、上限を超えた分を古い順に破棄"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_create(self, key, factory):
+        """キャッシュにあれば返し、なければ factory() の結果を登録して返す"""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """全件削除してカウンタを初期化"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """ヒット・ミス件数と現在の件数を返す"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+
+def content_key(*parts):
+    """内容（JSON に変換できる値）から決まるキャッシュのキー
+
+    dict はキーの順序によらず同じキーになる。日付などは文字列として扱う。
+    """
+    source = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """ディスク上の共有キャッシュ（内容のハッシュ値をキーとするバイト列の保存先）
+
+    セッション・サーバープロセスをまたいで共有する。合計サイズが max_bytes を超えたら
+    最近使用していないものから削除する（使用時にファイルの更新日時を更新して順序を記録）。
+    get_or_create は同じキーの作成をプロセス間のファイルロックで直列化し、
+    同時に同じ内容を要求されても作成は1回だけ行う（ロックはキーの先頭2文字ごとの256個を共用）。
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._written = 0
+        os.makedirs(os.path.join(directory, "locks"), exist_ok=True)
+
+    def __getstate__(self):
+        # ワーカープロセスには設定のみを渡す
+        return {"directory": self.directory, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return data
+
+    def get(self, key):
+        """保存済みのバイト列（なければ None）"""
+        data = self._read(key)
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """バイト列を保存（一時ファイル経由で置き換えるため、読み込み中のプロセスに影響しない）"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        # 書き込み量が上限の1割に達するごとに全体のサイズを確認する
+        self._written += len(data)
+        if self._written >= self.max_bytes // 10:
+            self._written = 0
+            self.evict()
+
+    @contextlib.contextmanager
+    def _lock(self, key):
+        """キーの排他ロック（プロセス・スレッド間）"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, "locks", f"{key[:2]}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_or_create(self, key, factory):
+        """保存済みなら返し、なければ factory() が返すバイト列を保存して返す"""
+        data = self.get(key)
+        if data is not None:
+            return data
+        with self._lock(key):
+            # ロック待ちの間に他のプロセスが作成していればそれを使う
+            data = self._read(key)
+            if data is None:
+                data = factory()
+                self.put(key, data)
+        return data
+
+    def evict(self):
+        """合計サイズが上限を超えていれば、最近使用していないものから上限の9割まで削除"""
+        entries = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            if os.path.basename(root) == "locks":
+                continue
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * 0.9:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            total -= size
+
+    def stats(self):
+        """ヒット・ミス件数（このインスタンスの分）"""
+        return {"hits": self.hits, "misses": self.misses}
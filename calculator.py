@@ -1,8 +1,87 @@
+import contextlib
+import copy
 from datetime import datetime
+import hashlib
+import json
 import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+from caching import LRUCache
+from claim_record import RECORD_FIELDS, ClaimRecord
+from instrumentation import span
+from leibniz import DEFAULT_RATES, LeibnizTable, leibnitz_coefficient
+
+# 一括計算で参照する項目（入力データの各セクションの項目名をそのまま列名として使う）
+BATCH_SECTIONS = ("基本情報", "職業情報", "収入情報", "治療情報", "後遺障害情報")
+
+# 計算結果の項目
+RESULT_FIELDS = ["治療関係費", "後遺障害逸失利益", "合計額"]
+
+
+def claims_to_frame(claims):
+    """入力データ（入れ子の dict または ClaimRecord）のリストを一括計算用の DataFrame に変換"""
+    rows = []
+    for claim in claims:
+        if isinstance(claim, ClaimRecord):
+            rows.append(claim.batch_row())
+            continue
+        row = {}
+        for section in BATCH_SECTIONS:
+            row.update(claim.get(section) or {})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+# 計算式の版（計算方法を変更したら上げ、保存済みの計算結果を無効にする）
+CALCULATOR_VERSION = 1
+
+# 逆算（solve）できる項目 → セクション名
+SOLVABLE_FIELDS = {
+    name: section for section, name in RECORD_FIELDS.values()
+    if name not in ("職種区分", "後遺障害あり", "後遺障害等級", "障害の種類")
+}
+
+# 結果が一次式になる項目（閾値をまたがない範囲）: 連立せずに1回の割り算で逆算する
+LINEAR_FIELDS = (
+    "医療費合計", "通院交通費合計", "今後の予想医療費", "看護費用", "その他医療関連費用",
+    "基本給", "諸手当", "時間外手当", "賞与",
+)
+
+# 計算で整数として扱う項目（逆算結果も整数で返す）
+INTEGER_FIELDS = ("今後の治療予定期間", "入院日数", "通院日数", "事故時年齢")
+
+# 逆算で探す範囲の上限（指定のない項目は SOLVE_LIMIT）
+SOLVE_LIMITS = {"今後の治療予定期間": 100, "入院日数": 36500, "通院日数": 36500, "事故時年齢": 120}
+SOLVE_LIMIT = 10 ** 12
+
+
+def _batch_column(claims, name, size, default=None, rows=None):
+    """一括計算用の列を取り出す（default 指定時は欠損を補完、rows 指定時はその行のみ）"""
+    if name not in claims:
+        if default is None:
+            raise KeyError(name)
+        return np.full(size if rows is None else int(np.count_nonzero(rows)), default)
+    values = pd.Series(claims[name])
+    if rows is not None:
+        values = values[np.asarray(rows)]
+    if default is not None:
+        values = values.fillna(default)
+    elif values.isna().any():
+        # 必須項目の欠損は calculate_compensation と同じく KeyError とする
+        raise KeyError(name)
+    return values.to_numpy()
+
+
+def _sections_digest(sections):
+    """入力データのセクション群の内容を表すハッシュ値"""
+    source = json.dumps(sections, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
 
 class CompensationCalculator:
-    def __init__(self):
+    def __init__(self, discount_rate=0.05, incremental=False, cache_size=1024):
         # 後遺障害等級別の労働能力喪失率
         self.disability_rates = {
             "1級": 100, "2級": 100, "3級": 100,
@@ -27,10 +106,18 @@ class CompensationCalculator:
         }
 
         # 年齢別就労可能年数とライプニッツ係数
+        self.discount_rate = discount_rate
         self.working_years = self._initialize_working_years()
+        self.leibniz_table = LeibnizTable(
+            rates=tuple(dict.fromkeys((discount_rate,) + DEFAULT_RATES)),
+            overrides={0.05: {age: row["coefficient"] for age, row in self.working_years.items()}}
+        )
+
+        # 差分計算用のキャッシュ（損害項目ごとに、参照するセクションの内容をキーとする）
+        self.component_cache = LRUCache(maxsize=cache_size) if incremental else None
 
     def _initialize_working_years(self):
-        """年齢別の就労可能年数とライプニッツ係数のテーブルを初期化"""
+        """年齢別の就労可能年数とライプニッツ係数の公表値（割引率5%）を初期化"""
         return {
             18: {"years": 49, "coefficient": 18.169},
             19: {"years": 48, "coefficient": 18.077},
@@ -41,40 +128,110 @@ class CompensationCalculator:
 
     def _calculate_leibnitz_coefficient(self, years, rate=0.05):
         """ライプニッツ係数を計算"""
-        if years <= 0:
-            return 0
-        return (1 - math.pow(1 + rate, -years)) / rate
+        return leibnitz_coefficient(years, rate)
+
+    def _cached(self, component, sections, compute):
+        """参照するセクションが前回と同じなら計算結果を再利用（incremental 有効時のみ）"""
+        if self.component_cache is None:
+            return compute()
+        key = (component, _sections_digest(sections))
+        return self.component_cache.get_or_create(key, compute)
+
+    def _cached_values(self, component, values, compute):
+        """_cached の ClaimRecord 版（参照する属性値のタプルをキーとする）"""
+        if self.component_cache is None:
+            return compute()
+        return self.component_cache.get_or_create((component, values), compute)
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        """料率表などを差し替えた計算機を作成（料率改定時の再計算用）
+
+        config のキー（いずれも省略可、省略した項目は既定値のまま）:
+            discount_rate: 割引率
+            disability_rates: {後遺障害等級: 労働能力喪失率（%）}
+            nursing_care_rates: {介護区分: {程度: 日額}}
+            leibniz_coefficients: {年齢: 係数}（discount_rate に対する公表値）
+        """
+        calculator = cls(discount_rate=config.get("discount_rate", 0.05), **kwargs)
+        calculator.disability_rates.update(config.get("disability_rates", {}))
+        for care_type, rates in config.get("nursing_care_rates", {}).items():
+            calculator.nursing_care_rates.setdefault(care_type, {}).update(rates)
+
+        coefficients = {int(age): value for age, value in config.get("leibniz_coefficients", {}).items()}
+        if coefficients:
+            overrides = {rate: dict(values) for rate, values in calculator.leibniz_table.overrides.items()}
+            overrides.setdefault(calculator.discount_rate, {}).update(coefficients)
+            calculator.leibniz_table = LeibnizTable(rates=calculator.leibniz_table.rates, overrides=overrides)
+        return calculator
+
+    def fingerprint(self):
+        """計算式の版と料率表・係数表の内容を表すハッシュ値（計算結果をキャッシュする際のキーに含める）"""
+        return _sections_digest([
+            CALCULATOR_VERSION, self.discount_rate, self.disability_rates,
+            self.nursing_care_rates, self.leibniz_table.overrides
+        ])
+
+    def clear_cache(self):
+        """差分計算用のキャッシュを破棄（料率表などを変更した場合に呼ぶ）"""
+        if self.component_cache is not None:
+            self.component_cache.clear()
+
+    def _age_coefficient(self, age):
+        """事故時年齢に対応するライプニッツ係数を取得"""
+        return self.leibniz_table.coefficient(age, self.discount_rate)
+
+    def _future_cost_factors(self, max_years):
+        """治療予定期間ごとの物価上昇込み累積係数（index = 年数）"""
+        factors = [0]
+        total = 0
+        for i in range(max(max_years, 0)):
+            total += math.pow(1.02, i)
+            factors.append(total)
+        return np.array(factors, dtype=float)
 
     def _calculate_income_base(self, income_info, employment_info):
         """基礎収入を計算"""
-        monthly_base = (income_info["基本給"] + income_info["諸手当"]) * 10000
+        return self._income_base(
+            income_info["基本給"], income_info["諸手当"], income_info.get("時間外手当", 0),
+            income_info.get("賞与", 0), income_info.get("直近3年平均年収", 0)
+        )
+
+    def _income_base(self, base_salary, allowances, overtime_pay, bonus, average_income_3years):
+        """基礎収入（月額）"""
+        monthly_base = (base_salary + allowances) * 10000
         
-        if income_info.get("時間外手当", 0) > 0:
-            monthly_base += income_info["時間外手当"] * 10000
+        if overtime_pay > 0:
+            monthly_base += overtime_pay * 10000
         
-        if income_info.get("賞与", 0) > 0:
-            monthly_bonus = (income_info["賞与"] * 10000) / 12
+        if bonus > 0:
+            monthly_bonus = (bonus * 10000) / 12
             monthly_base += monthly_bonus
         
-        if income_info.get("直近3年平均年収", 0) > 0:
-            monthly_3years = (income_info["直近3年平均年収"] * 10000) / 12
+        if average_income_3years > 0:
+            monthly_3years = (average_income_3years * 10000) / 12
             monthly_base = max(monthly_base, monthly_3years)
         
         return monthly_base
 
     def _calculate_disability_grade_adjustment(self, disability_info, basic_info):
         """後遺障害等級に基づく調整係数を計算"""
-        base_rate = self.disability_rates[disability_info["後遺障害等級"]]
+        return self._grade_adjustment(
+            disability_info["後遺障害等級"], basic_info["事故時年齢"], disability_info.get("障害の種類")
+        )
+
+    def _grade_adjustment(self, grade, age, disability_type):
+        """等級・年齢・障害の種類による労働能力喪失率（%）"""
+        base_rate = self.disability_rates[grade]
         
-        age = basic_info["事故時年齢"]
         if age < 25:
             base_rate *= 1.1
         elif age > 60:
             base_rate *= 0.9
             
-        if disability_info.get("障害の種類") == "精神的障害":
+        if disability_type == "精神的障害":
             base_rate *= 1.1
-        elif disability_info.get("障害の種類") == "両方":
+        elif disability_type == "両方":
             base_rate *= 1.2
             
         return min(base_rate, 100)
@@ -84,64 +241,94 @@ class CompensationCalculator:
         if not disability_info.get("後遺障害あり", False):
             return 0
             
-        monthly_income = self._calculate_income_base(income_info, employment_info)
+        monthly_income = self._cached(
+            "基礎収入", [income_info],
+            lambda: self._calculate_income_base(income_info, employment_info)
+        )
         annual_income = monthly_income * 12
         
-        loss_rate = self._calculate_disability_grade_adjustment(disability_info, basic_info) / 100
+        loss_rate = self._cached(
+            "等級調整", [disability_info, basic_info],
+            lambda: self._calculate_disability_grade_adjustment(disability_info, basic_info)
+        ) / 100
         
-        age = basic_info["事故時年齢"]
-        if age in self.working_years:
-            coefficient = self.working_years[age]["coefficient"]
-        else:
-            remaining_years = max(67 - age, 0)
-            coefficient = self._calculate_leibnitz_coefficient(remaining_years)
+        return self._disability_loss(
+            annual_income, loss_rate, basic_info["事故時年齢"], employment_info.get("職種区分")
+        )
+
+    def _disability_loss(self, annual_income, loss_rate, age, job_type):
+        """年収・労働能力喪失率・年齢・職種区分から逸失利益を計算"""
+        coefficient = self._age_coefficient(age)
         
         disability_loss = annual_income * loss_rate * coefficient
         
         if age < 25:
             disability_loss *= 1.2
             
-        if employment_info.get("職種区分") in ["専門職", "技能職"]:
+        if job_type in ["専門職", "技能職"]:
             disability_loss *= 1.1
         
         return int(disability_loss)
 
     def _calculate_treatment_cost(self, treatment_info):
         """治療関係費の計算"""
-        current_cost = treatment_info["医療費合計"]
+        return self._treatment_cost(
+            treatment_info["医療費合計"], treatment_info["通院交通費合計"], treatment_info["通院日数"],
+            treatment_info.get("今後の予想医療費", 0), treatment_info.get("今後の治療予定期間", 0),
+            treatment_info.get("看護費用", 0), treatment_info["入院日数"],
+            treatment_info.get("その他医療関連費用", 0)
+        )
+
+    def _treatment_cost(self, medical_cost, transport_cost, outpatient_days, future_medical_cost,
+                        future_treatment_years, nursing_cost, hospital_days, other_medical_cost):
+        """治療関係費（各項目の値から計算）"""
+        current_cost = medical_cost
         
         transport_base = max(
-            treatment_info["通院交通費合計"],
-            treatment_info["通院日数"] * 2000
+            transport_cost,
+            outpatient_days * 2000
         )
         
-        future_annual = treatment_info.get("今後の予想医療費", 0)
-        future_years = int(treatment_info.get("今後の治療予定期間", 0))
+        future_annual = future_medical_cost
+        future_years = int(future_treatment_years)
         inflation_rate = 1.02
         future_cost = future_annual * sum(
             math.pow(inflation_rate, i) 
             for i in range(future_years)
         )
         
-        nursing_cost = treatment_info.get("看護費用", 0)
-        if treatment_info["入院日数"] > 30:
+        if hospital_days > 30:
             nursing_cost *= 1.2
             
-        other_cost = treatment_info.get("その他医療関連費用", 0)
+        other_cost = other_medical_cost
         
         return int(current_cost + transport_base + future_cost + nursing_cost + other_cost)
 
     def calculate_compensation(self, input_data):
-        """損害賠償額を計算（メインメソッド）"""
+        """損害賠償額を計算（メインメソッド）
+
+        input_data には入れ子の入力データ（dict）または ClaimRecord を渡す。
+        """
+        if isinstance(input_data, ClaimRecord):
+            return self._calculate_record(input_data)
         try:
-            treatment_cost = self._calculate_treatment_cost(input_data["治療情報"])
+            with span("治療関係費"):
+                treatment_cost = self._cached(
+                    "治療関係費", [input_data["治療情報"]],
+                    lambda: self._calculate_treatment_cost(input_data["治療情報"])
+                )
             
-            disability_loss = self._calculate_disability_loss(
+            disability_sections = [
                 input_data.get("後遺障害情報", {}),
                 input_data["基本情報"],
                 input_data["収入情報"],
                 input_data["職業情報"]
-            )
+            ]
+            with span("後遺障害逸失利益"):
+                disability_loss = self._cached(
+                    "後遺障害逸失利益", disability_sections + [self.discount_rate],
+                    lambda: self._calculate_disability_loss(*disability_sections)
+                )
             
             # 簡易版の結果返却
             return {
@@ -153,3 +340,305 @@ class CompensationCalculator:
         except Exception as e:
             print(f"計算エラー: {e}")
             raise
+
+    def _calculate_record(self, record):
+        """ClaimRecord の損害賠償額を計算（検証・既定値の補完は構築時に済んでいる）"""
+        treatment_values = (
+            record.medical_cost, record.transport_cost, record.outpatient_days,
+            record.future_medical_cost, record.future_treatment_years, record.nursing_cost,
+            record.hospital_days, record.other_medical_cost
+        )
+        with span("治療関係費"):
+            treatment_cost = self._cached_values(
+                "治療関係費", treatment_values,
+                lambda: self._treatment_cost(*treatment_values)
+            )
+
+        disability_loss = 0
+        if record.has_disability:
+            with span("後遺障害逸失利益"):
+                disability_loss = self._cached_values(
+                    "後遺障害逸失利益",
+                    (record.base_salary, record.allowances, record.overtime_pay, record.bonus,
+                     record.average_income_3years, record.disability_grade, record.age,
+                     record.disability_type, record.job_type, self.discount_rate),
+                    lambda: self._calculate_record_disability_loss(record)
+                )
+
+        return {
+            "治療関係費": treatment_cost,
+            "後遺障害逸失利益": disability_loss,
+            "合計額": treatment_cost + disability_loss
+        }
+
+    def _calculate_record_disability_loss(self, record):
+        """ClaimRecord の後遺障害逸失利益（後遺障害ありの場合のみ呼ぶ）"""
+        annual_income = self._income_base(
+            record.base_salary, record.allowances, record.overtime_pay,
+            record.bonus, record.average_income_3years
+        ) * 12
+        loss_rate = self._grade_adjustment(
+            record.disability_grade.value, record.age,
+            record.disability_type.value if record.disability_type is not None else None
+        ) / 100
+        job_type = record.job_type.value if record.job_type is not None else None
+        return self._disability_loss(annual_income, loss_rate, record.age, job_type)
+
+    def calculate_batch(self, claims):
+        """損害賠償額を一括計算（calculate_compensation の列指向版）
+
+        claims には pandas.DataFrame または「項目名 → 配列」の dict を渡す。
+        列名は入力データの項目名（"医療費合計", "事故時年齢" など）をそのまま用い、
+        入れ子の入力データからは claims_to_frame で変換できる。
+        "割引率" 列を指定すると行ごとの割引率でライプニッツ係数を求める。
+        結果は calculate_compensation と同一の値になる。
+        """
+        size = len(claims) if isinstance(claims, pd.DataFrame) else len(next(iter(claims.values()), []))
+
+        def column(name, default=None, rows=None):
+            return _batch_column(claims, name, size, default, rows)
+
+        # 治療関係費
+        current_cost = column("医療費合計").astype(float)
+        transport_base = np.maximum(
+            column("通院交通費合計").astype(float),
+            column("通院日数").astype(float) * 2000
+        )
+
+        future_annual = column("今後の予想医療費", 0).astype(float)
+        future_years = np.trunc(column("今後の治療予定期間", 0).astype(float)).astype(np.int64)
+        future_years = np.maximum(future_years, 0)
+        factors = self._future_cost_factors(int(future_years.max()) if size else 0)
+        future_cost = future_annual * factors[future_years]
+
+        nursing_cost = column("看護費用", 0).astype(float)
+        nursing_cost = np.where(column("入院日数").astype(float) > 30, nursing_cost * 1.2, nursing_cost)
+        other_cost = column("その他医療関連費用", 0).astype(float)
+
+        treatment_cost = np.trunc(
+            current_cost + transport_base + future_cost + nursing_cost + other_cost
+        ).astype(np.int64)
+
+        # 後遺障害逸失利益
+        has_disability = column("後遺障害あり", False).astype(bool)
+        disability_loss = np.zeros(size, dtype=np.int64)
+        if has_disability.any():
+            disability_loss[has_disability] = self._calculate_batch_disability_loss(
+                {name: column(name, default, has_disability) for name, default in (
+                    ("基本給", None), ("諸手当", None), ("時間外手当", 0), ("賞与", 0),
+                    ("直近3年平均年収", 0), ("後遺障害等級", None), ("障害の種類", ""),
+                    ("事故時年齢", None), ("職種区分", ""), ("割引率", self.discount_rate),
+                )}
+            )
+
+        results = {
+            "治療関係費": treatment_cost,
+            "後遺障害逸失利益": disability_loss,
+            "合計額": treatment_cost + disability_loss
+        }
+        if isinstance(claims, pd.DataFrame):
+            return pd.DataFrame(results, index=claims.index)
+        return results
+
+    def calculate_claims(self, claims):
+        """請求をまとめて一括計算し、入力に不備のある請求が含まれる場合のみ1件ずつ計算する
+
+        claims には入力データ（入れ子の dict または ClaimRecord）のリスト、または calculate_batch と
+        同じ DataFrame を渡す。戻り値は RESULT_FIELDS と "error" の列を持つ DataFrame（行は claims の順）で、
+        計算できなかった請求は金額を欠損値とし、error にエラー内容を設定する。
+        """
+        is_frame = isinstance(claims, pd.DataFrame)
+        try:
+            results = self.calculate_batch(claims if is_frame else claims_to_frame(claims))
+            return results[RESULT_FIELDS].assign(error=None).reset_index(drop=True)
+        except Exception:
+            pass
+
+        rows = []
+        for index in range(len(claims)):
+            try:
+                if is_frame:
+                    rows.append(self.calculate_batch(claims.iloc[[index]]).iloc[0].to_dict())
+                else:
+                    # 計算エラーのメッセージが標準出力の結果に混ざらないようにする
+                    with contextlib.redirect_stdout(sys.stderr):
+                        rows.append(self.calculate_compensation(claims[index]))
+            except Exception as e:
+                rows.append({"error": f"{type(e).__name__}: {e}"})
+        results = {name: pd.array([row.get(name) for row in rows], dtype="Int64") for name in RESULT_FIELDS}
+        results["error"] = pd.Series([row.get("error") for row in rows], dtype=object)
+        return pd.DataFrame(results, columns=RESULT_FIELDS + ["error"])
+
+    def _calculate_batch_disability_loss(self, columns):
+        """後遺障害逸失利益の一括計算（後遺障害ありの行のみ）"""
+        # 基礎収入
+        monthly_base = (columns["基本給"].astype(float) + columns["諸手当"].astype(float)) * 10000
+        overtime = columns["時間外手当"].astype(float)
+        monthly_base = np.where(overtime > 0, monthly_base + overtime * 10000, monthly_base)
+        bonus = columns["賞与"].astype(float)
+        monthly_base = np.where(bonus > 0, monthly_base + (bonus * 10000) / 12, monthly_base)
+        average_3years = columns["直近3年平均年収"].astype(float)
+        monthly_base = np.where(
+            average_3years > 0,
+            np.maximum(monthly_base, (average_3years * 10000) / 12),
+            monthly_base
+        )
+        annual_income = monthly_base * 12
+
+        # 等級・年齢・障害の種類による調整
+        grades = pd.Series(columns["後遺障害等級"])
+        base_rate = grades.map(self.disability_rates)
+        if base_rate.isna().any():
+            raise KeyError(grades[base_rate.isna()].iloc[0])
+        base_rate = base_rate.to_numpy(dtype=float)
+
+        age = columns["事故時年齢"].astype(float)
+        base_rate = np.where(age < 25, base_rate * 1.1, np.where(age > 60, base_rate * 0.9, base_rate))
+        disability_type = columns["障害の種類"]
+        base_rate = np.where(
+            disability_type == "精神的障害", base_rate * 1.1,
+            np.where(disability_type == "両方", base_rate * 1.2, base_rate)
+        )
+        loss_rate = np.minimum(base_rate, 100) / 100
+
+        rates = columns["割引率"].astype(float)
+        coefficient = np.zeros(len(age), dtype=float)
+        for rate in np.unique(rates):
+            mask = rates == rate
+            coefficient[mask] = self.leibniz_table.lookup(age[mask], float(rate))
+
+        disability_loss = annual_income * loss_rate * coefficient
+        disability_loss = np.where(age < 25, disability_loss * 1.2, disability_loss)
+        disability_loss = np.where(
+            np.isin(columns["職種区分"], ["専門職", "技能職"]),
+            disability_loss * 1.1,
+            disability_loss
+        )
+        return np.trunc(disability_loss).astype(np.int64)
+
+    def solve(self, input_data, field, target, result="合計額", low=None, high=None, tolerance=1):
+        """結果（result）が目標額 target になる入力項目 field の値を逆算（ゴールシーク）
+
+        LINEAR_FIELDS は2点の計算から傾きを求めて直接解き（検算して外れた場合のみ二分法）、
+        それ以外の項目は [low, high] の範囲で二分法により求める。
+        low / high を省略すると 0 から上限を倍々に広げて目標額をまたぐ範囲を探す
+        （広げるのは項目ごとの上限 SOLVE_LIMITS まで）。
+        INTEGER_FIELDS は目標額を超える（減少する場合は下回る）最小の整数を返す。
+        戻り値は {"値": 逆算した値, "結果": その値での結果, "方法": "線形"・"二分法"・"下限"}。
+        目標額に届かない場合、結果が項目の値によらず一定の場合は ValueError とする。
+        """
+        if field not in SOLVABLE_FIELDS:
+            raise ValueError(f"逆算できない項目です: {field}")
+        section = SOLVABLE_FIELDS[field]
+        if isinstance(input_data, ClaimRecord):
+            input_data = input_data.to_dict()
+        # 試算で差分計算用のキャッシュを埋めないよう、キャッシュなしの計算機で評価する
+        evaluator = self
+        if self.component_cache is not None:
+            evaluator = copy.copy(self)
+            evaluator.component_cache = None
+
+        def evaluate(value):
+            trial = dict(input_data)
+            trial[section] = dict(input_data.get(section) or {}, **{field: value})
+            return evaluator.calculate_compensation(trial)[result]
+
+        current = (input_data.get(section) or {}).get(field) or 0
+        if field in LINEAR_FIELDS:
+            value = current
+            step = max(abs(current), 1)
+            achieved = evaluate(value)
+            for _ in range(3):
+                slope = (evaluate(value + step) - achieved) / step
+                if slope == 0:
+                    break
+                value = value + (target - achieved) / slope
+                if value < 0:
+                    break
+                achieved = evaluate(value)
+                if abs(achieved - target) <= tolerance:
+                    return {"値": value, "結果": achieved, "方法": "線形"}
+                step = max(abs(target - achieved) / slope, 1e-6)
+
+        limit = SOLVE_LIMITS.get(field, SOLVE_LIMIT)
+        return self._bracket(evaluate, target, field in INTEGER_FIELDS, low, high, tolerance, current, limit)
+
+    def _bracket(self, evaluate, target, integer, low, high, tolerance, current, limit):
+        """二分法による逆算（solve から呼ぶ）"""
+        low = 0 if low is None else low
+        low_result = evaluate(low)
+        if abs(low_result - target) <= tolerance:
+            return {"値": low, "結果": low_result, "方法": "下限"}
+        low_sign = low_result >= target
+        if high is None:
+            high = min(max(current, 1), limit)
+            while True:
+                high_result = evaluate(high)
+                if (high_result >= target) != low_sign:
+                    break
+                if high >= limit:
+                    if high_result == low_result:
+                        raise ValueError(f"[{low}, {limit}] の範囲では結果が変わらないため逆算できません")
+                    raise ValueError(f"目標額 {target:,} に届く範囲が見つかりません（上限 {limit:,}）")
+                high = min(high * 2, limit)
+        elif (evaluate(high) >= target) == low_sign:
+            raise ValueError(f"[{low}, {high}] の範囲では目標額 {target:,} をまたぎません")
+
+        if integer:
+            # 符号が変わる最小の整数（low 側は含まない）
+            low, high = math.floor(low), math.ceil(high)
+            while high - low > 1:
+                middle = (low + high) // 2
+                if (evaluate(middle) >= target) == low_sign:
+                    low = middle
+                else:
+                    high = middle
+            return {"値": high, "結果": evaluate(high), "方法": "二分法"}
+
+        for _ in range(200):
+            middle = (low + high) / 2
+            achieved = evaluate(middle)
+            if abs(achieved - target) <= tolerance or middle in (low, high):
+                break
+            if (achieved >= target) == low_sign:
+                low = middle
+            else:
+                high = middle
+        return {"値": middle, "結果": achieved, "方法": "二分法"}
+
+    def sweep(self, input_data, axes):
+        """入力データの項目を変化させた全組合せを一括計算（感応度分析）
+
+        axes は {項目名: 値のリスト} で、項目名は calculate_batch の列名
+        （"後遺障害等級", "事故時年齢", "基本給", "今後の治療予定期間", "割引率" など）。
+        後遺障害等級を変化させる場合、None 以外の等級は後遺障害ありとして計算する。
+        戻り値は各軸の値と計算結果を列に持つ DataFrame（軸の直積順）。
+        """
+        names = list(axes)
+        grid = pd.MultiIndex.from_product([list(axes[name]) for name in names], names=names).to_frame(index=False)
+
+        base = claims_to_frame([input_data]).drop(columns=names, errors="ignore")
+        claims = base.iloc[np.zeros(len(grid), dtype=np.int64)].reset_index(drop=True)
+        claims = pd.concat([claims, grid], axis=1)
+        if "後遺障害等級" in names:
+            claims["後遺障害あり"] = claims["後遺障害等級"].notna()
+
+        return pd.concat([grid, self.calculate_batch(claims)], axis=1)
+
+    def sweep_grid(self, input_data, axes, value="合計額"):
+        """sweep の結果を、各軸を次元とする NumPy 配列で返す"""
+        result = self.sweep(input_data, axes)
+        return result[value].to_numpy().reshape([len(axes[name]) for name in axes])
+
+
+# プロセス内で共有する計算機（料率表などの設定ごと、並列処理のワーカーで使う）
+_shared_calculators = LRUCache(maxsize=16)
+
+
+def shared_calculator(config=None):
+    """料率表などの設定（CompensationCalculator.from_config の形式）ごとにプロセス内で共有する計算機"""
+    config = config or {}
+    return _shared_calculators.get_or_create(
+        json.dumps(config, ensure_ascii=False, sort_keys=True, default=str),
+        lambda: CompensationCalculator.from_config(config)
+    )
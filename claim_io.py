@@ -0,0 +1,135 @@
+import csv
+from dataclasses import dataclass
+import json
+import os
+import sys
+
+# 入力データのセクションと項目（app.py の input_data と同じ構成）
+CLAIM_FIELDS = {
+    "基本情報": ["生年月日", "事故日", "性別", "事故時年齢", "扶養家族あり"],
+    "職業情報": ["雇用形態", "職種区分", "勤続年数", "会社規模"],
+    "収入情報": ["基本給", "諸手当", "賞与", "時間外手当", "その他収入", "前年度年収", "直近3年平均年収"],
+    "治療情報": [
+        "入院日数", "通院日数", "医療費合計", "通院交通費合計",
+        "今後の予想医療費", "今後の治療予定期間", "看護費用", "その他医療関連費用"
+    ],
+    "後遺障害情報": ["後遺障害あり", "後遺障害等級", "障害の種類", "介護必要", "介護レベル", "介護必要期間"],
+    "休業損害情報": ["全日休業日数", "半日休業日数", "休業期間中の給与支給額", "昇進昇給予定", "予定昇給額"],
+    "事故状況": ["事故の種類", "過失割合", "加害者の悪質性"],
+    "素因・既往症情報": ["既往症あり", "既往症の影響度", "体質的素因あり", "体質的素因の影響度"],
+}
+
+# 項目名 → セクション名
+FIELD_SECTIONS = {field: section for section, fields in CLAIM_FIELDS.items() for field in fields}
+
+# 請求を識別する項目（JSONL ではトップレベル、CSV では列として指定）
+ID_FIELD = "登録番号"
+
+
+def detect_format(path):
+    """拡張子から入力形式（jsonl / csv）を判定"""
+    return "csv" if str(path).lower().endswith(".csv") else "jsonl"
+
+
+def _parse_csv_value(value):
+    """CSV の文字列値を数値・真偽値に変換"""
+    if value in ("True", "true"):
+        return True
+    if value in ("False", "false"):
+        return False
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+def row_to_claim(row):
+    """CSV の1行（列名 → 値）を入れ子の入力データに変換
+
+    列名は項目名（"医療費合計"）または「セクション.項目名」（"治療情報.医療費合計"）。
+    """
+    claim = {}
+    for column, value in row.items():
+        if column == ID_FIELD:
+            claim[ID_FIELD] = value
+            continue
+        if "." in column:
+            section, field = column.split(".", 1)
+        else:
+            section, field = FIELD_SECTIONS.get(column), column
+        if section is None or value in (None, ""):
+            # 空欄は未入力として扱い、計算側の既定値に任せる
+            continue
+        claim.setdefault(section, {})[field] = _parse_csv_value(value)
+    return claim
+
+
+def claim_to_row(claim):
+    """入れ子の入力データを CSV の1行（項目名 → 値）に変換"""
+    row = {}
+    if ID_FIELD in claim:
+        row[ID_FIELD] = claim[ID_FIELD]
+    for section in CLAIM_FIELDS:
+        for field, value in (claim.get(section) or {}).items():
+            row[field if FIELD_SECTIONS.get(field) == section else f"{section}.{field}"] = value
+    return row
+
+
+def _open_text(source):
+    """パス・'-'（標準入力）・ファイルオブジェクトをテキストストリームとして開く"""
+    if source == "-" or source is None:
+        return sys.stdin, False
+    if hasattr(source, "read"):
+        return source, False
+    return open(source, encoding="utf-8", newline=""), True
+
+
+@dataclass(frozen=True)
+class InvalidClaim:
+    """読み込めなかった入力行（read_claims に errors="yield" を指定した場合に請求データの代わりに返す）"""
+    line: int
+    error: str
+
+
+def read_claims(source, format=None, errors="raise"):
+    """請求データを1件ずつ読み込むジェネレータ（JSONL / CSV）
+
+    JSONL の各行は入力データの dict そのもの。
+    読み込めない行は errors="raise" では ValueError（行番号付き）とし、
+    errors="yield" では InvalidClaim を返して残りの行の読み込みを続ける。
+    """
+    format = format or (detect_format(source) if isinstance(source, (str, os.PathLike)) else "jsonl")
+    stream, should_close = _open_text(source)
+    try:
+        if format == "csv":
+            for row in csv.DictReader(stream):
+                yield row_to_claim(row)
+        elif format == "jsonl":
+            for number, line in enumerate(stream, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    claim = json.loads(line)
+                    if not isinstance(claim, dict):
+                        raise ValueError(f"入力データは JSON のオブジェクトで指定してください（{type(claim).__name__}）")
+                except ValueError as e:
+                    message = f"{number}行目: {type(e).__name__}: {e}"
+                    if errors != "yield":
+                        raise ValueError(message) from e
+                    yield InvalidClaim(number, message)
+                    continue
+                yield claim
+        else:
+            raise ValueError(f"不明な入力形式です: {format}")
+    finally:
+        if should_close:
+            stream.close()
+
+
+def claim_id(claim, index):
+    """請求の識別子（登録番号がなければ入力順の連番）"""
+    value = None if isinstance(claim, InvalidClaim) else claim.get(ID_FIELD)
+    return str(value) if value not in (None, "") else f"{index:07d}"
@@ -0,0 +1,216 @@
+"""請求データの型付きレコード
+
+入れ子の入力データ（dict）を検証・正規化済みの ClaimRecord に変換しておくと、
+計算のたびに項目名の検索や既定値の補完を行わずに済み、メモリ使用量も小さくなる。
+"""
+from dataclasses import dataclass, field
+from enum import Enum
+import numbers
+
+
+class DisabilityGrade(str, Enum):
+    """後遺障害等級"""
+    GRADE_1 = "1級"
+    GRADE_2 = "2級"
+    GRADE_3 = "3級"
+    GRADE_4 = "4級"
+    GRADE_5 = "5級"
+    GRADE_6 = "6級"
+    GRADE_7 = "7級"
+    GRADE_8 = "8級"
+    GRADE_9 = "9級"
+    GRADE_10 = "10級"
+    GRADE_11 = "11級"
+    GRADE_12 = "12級"
+    GRADE_13 = "13級"
+    GRADE_14 = "14級"
+
+
+class DisabilityType(str, Enum):
+    """後遺障害の種類"""
+    PHYSICAL = "身体的障害"
+    MENTAL = "精神的障害"
+    BOTH = "両方"
+
+
+class JobType(str, Enum):
+    """職種区分"""
+    GENERAL = "一般"
+    MANAGER = "管理職"
+    PROFESSIONAL = "専門職"
+    SKILLED = "技能職"
+    SALES_SERVICE = "販売・サービス"
+    OTHER = "その他"
+
+
+# 計算に使う項目: 属性名 → (セクション名, 項目名)
+RECORD_FIELDS = {
+    "age": ("基本情報", "事故時年齢"),
+    "job_type": ("職業情報", "職種区分"),
+    "base_salary": ("収入情報", "基本給"),
+    "allowances": ("収入情報", "諸手当"),
+    "bonus": ("収入情報", "賞与"),
+    "overtime_pay": ("収入情報", "時間外手当"),
+    "average_income_3years": ("収入情報", "直近3年平均年収"),
+    "hospital_days": ("治療情報", "入院日数"),
+    "outpatient_days": ("治療情報", "通院日数"),
+    "medical_cost": ("治療情報", "医療費合計"),
+    "transport_cost": ("治療情報", "通院交通費合計"),
+    "future_medical_cost": ("治療情報", "今後の予想医療費"),
+    "future_treatment_years": ("治療情報", "今後の治療予定期間"),
+    "nursing_cost": ("治療情報", "看護費用"),
+    "other_medical_cost": ("治療情報", "その他医療関連費用"),
+    "has_disability": ("後遺障害情報", "後遺障害あり"),
+    "disability_grade": ("後遺障害情報", "後遺障害等級"),
+    "disability_type": ("後遺障害情報", "障害の種類"),
+}
+
+# (セクション名, 項目名) → 属性名
+_FIELD_ATTRS = {key: attr for attr, key in RECORD_FIELDS.items()}
+
+# 常に必要な項目と、後遺障害ありの場合に必要な項目
+_REQUIRED = ("hospital_days", "outpatient_days", "medical_cost", "transport_cost")
+_REQUIRED_WITH_DISABILITY = ("age", "base_salary", "allowances", "disability_grade")
+
+# 省略時に 0 とする数値項目
+_OPTIONAL_NUMBERS = (
+    "bonus", "overtime_pay", "average_income_3years", "future_medical_cost",
+    "future_treatment_years", "nursing_cost", "other_medical_cost",
+)
+
+_ENUM_FIELDS = {"job_type": JobType, "disability_grade": DisabilityGrade, "disability_type": DisabilityType}
+
+# 入力データの構成（セクションと項目の並び）と、0 で補完した項目の組は請求ごとに共有する
+_layouts = {}
+
+
+def _intern_layout(layout):
+    return _layouts.setdefault(layout, layout)
+
+
+@dataclass(frozen=True, slots=True)
+class ClaimRecord:
+    """検証・正規化済みの請求データ
+
+    計算に使う項目は属性として持ち、それ以外の項目（生年月日、事故状況など）は
+    元の構成とともに保持するため、from_dict と to_dict で入力データを損なわずに相互変換できる。
+    不正な値・必須項目の欠落は構築時に ValueError とする。
+    """
+
+    age: numbers.Real = None
+    job_type: JobType = None
+    base_salary: numbers.Real = None
+    allowances: numbers.Real = None
+    bonus: numbers.Real = None
+    overtime_pay: numbers.Real = None
+    average_income_3years: numbers.Real = None
+    hospital_days: numbers.Real = None
+    outpatient_days: numbers.Real = None
+    medical_cost: numbers.Real = None
+    transport_cost: numbers.Real = None
+    future_medical_cost: numbers.Real = None
+    future_treatment_years: numbers.Real = None
+    nursing_cost: numbers.Real = None
+    other_medical_cost: numbers.Real = None
+    has_disability: bool = False
+    disability_grade: DisabilityGrade = None
+    disability_type: DisabilityType = None
+    # 計算に使わない項目の値（layout の並び順）と、入力データの構成
+    extras: tuple = field(default=(), repr=False, hash=False)
+    layout: tuple = field(default=None, repr=False, compare=False)
+    # 未入力（None）のため計算用に 0 とした項目（to_dict では None に戻す）
+    defaulted: frozenset = field(default=frozenset(), repr=False, compare=False)
+
+    def __post_init__(self):
+        for name, enum in _ENUM_FIELDS.items():
+            value = getattr(self, name)
+            if value is not None and not isinstance(value, enum):
+                try:
+                    object.__setattr__(self, name, enum(value))
+                except ValueError:
+                    raise ValueError(f"{self._label(name)}の値が不正です: {value!r}") from None
+
+        if self.has_disability not in (True, False):
+            raise ValueError(f"{self._label('has_disability')}の値が不正です: {self.has_disability!r}")
+        object.__setattr__(self, "has_disability", bool(self.has_disability))
+
+        required = _REQUIRED + (_REQUIRED_WITH_DISABILITY if self.has_disability else ())
+        for name in required:
+            if getattr(self, name) is None:
+                raise ValueError(f"{self._label(name)}が入力されていません")
+
+        defaulted = [name for name in _OPTIONAL_NUMBERS if getattr(self, name) is None]
+        for name in defaulted:
+            object.__setattr__(self, name, 0)
+        if defaulted:
+            object.__setattr__(self, "defaulted", _intern_layout(frozenset(defaulted)))
+
+        for name in RECORD_FIELDS:
+            value = getattr(self, name)
+            if name in _ENUM_FIELDS or name == "has_disability" or value is None:
+                continue
+            if not isinstance(value, numbers.Real) or isinstance(value, bool) or value != value:
+                raise ValueError(f"{self._label(name)}の値が不正です: {value!r}")
+
+    @staticmethod
+    def _label(name):
+        section, key = RECORD_FIELDS[name]
+        return f"{section}.{key}"
+
+    @classmethod
+    def from_dict(cls, input_data):
+        """入れ子の入力データから作成"""
+        values = {}
+        extras = []
+        layout = []
+        for key, section in input_data.items():
+            if not isinstance(section, dict):
+                layout.append((key, None))
+                extras.append(section)
+                continue
+            layout.append((key, tuple(section)))
+            for name, value in section.items():
+                attr = _FIELD_ATTRS.get((key, name))
+                if attr is None:
+                    extras.append(value)
+                else:
+                    values[attr] = value
+        return cls(**values, extras=tuple(extras), layout=_intern_layout(tuple(layout)))
+
+    def to_dict(self):
+        """入れ子の入力データに変換（from_dict に渡した入力データと同じ内容になる）"""
+        if self.layout is None:
+            return self._canonical_dict()
+
+        extras = iter(self.extras)
+        input_data = {}
+        for key, names in self.layout:
+            if names is None:
+                input_data[key] = next(extras)
+                continue
+            section = input_data[key] = {}
+            for name in names:
+                attr = _FIELD_ATTRS.get((key, name))
+                section[name] = next(extras) if attr is None else self._input_value(attr)
+        return input_data
+
+    def _canonical_dict(self):
+        """計算に使う項目のみの入力データ（属性を直接指定して作成した場合）"""
+        input_data = {}
+        for attr, (section, name) in RECORD_FIELDS.items():
+            value = self._input_value(attr)
+            if value is not None or section == "後遺障害情報":
+                input_data.setdefault(section, {})[name] = value
+        return input_data
+
+    def _plain(self, attr):
+        value = getattr(self, attr)
+        return value.value if isinstance(value, Enum) else value
+
+    def _input_value(self, attr):
+        """入力データとしての値（0 で補完した項目は未入力の None）"""
+        return None if attr in self.defaulted else self._plain(attr)
+
+    def batch_row(self):
+        """一括計算用の1行（項目名 → 値、claims_to_frame の列と同じ）"""
+        return {name: self._plain(attr) for attr, (_, name) in RECORD_FIELDS.items()}
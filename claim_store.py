@@ -0,0 +1,206 @@
+from datetime import datetime
+import json
+import os
+import sqlite3
+import threading
+
+# 登録番号（7桁）の範囲
+REGISTRATION_NUMBER_MIN = 1000000
+REGISTRATION_NUMBER_MAX = 9999999
+
+DEFAULT_DB_PATH = os.environ.get("SEKISAN_DB_PATH", "claims.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    reg_number TEXT PRIMARY KEY,
+    accident_date TEXT,
+    grade TEXT,
+    input_data TEXT NOT NULL,
+    results TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_claims_accident_date ON claims (accident_date);
+CREATE INDEX IF NOT EXISTS idx_claims_grade ON claims (grade);
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _index_values(input_data):
+    """検索用の列（事故日・後遺障害等級）を入力データから取り出す"""
+    basic_info = input_data.get("基本情報") or {}
+    disability_info = input_data.get("後遺障害情報") or {}
+    grade = disability_info.get("後遺障害等級") if disability_info.get("後遺障害あり") else None
+    return basic_info.get("事故日"), grade
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class ClaimStore:
+    """請求データの永続化（SQLite、WAL モード）
+
+    登録番号は sequences テーブルから採番するため重複しない。
+    接続はスレッドごとに作成し、複数セッションからの同時利用に対応する。
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, timeout=30):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO sequences (name, value) VALUES ('claims', ?)",
+                (REGISTRATION_NUMBER_MIN - 1,)
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def close(self):
+        """このスレッドの接続を閉じる"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _allocate(self, conn, count):
+        """登録番号を count 件分まとめて採番（トランザクション内で呼ぶ）"""
+        conn.execute("UPDATE sequences SET value = value + ? WHERE name = 'claims'", (count,))
+        last = conn.execute("SELECT value FROM sequences WHERE name = 'claims'").fetchone()[0]
+        if last > REGISTRATION_NUMBER_MAX:
+            raise ValueError("登録番号の上限に達しました")
+        return [str(number) for number in range(last - count + 1, last + 1)]
+
+    def allocate_number(self):
+        """重複しない登録番号を1件採番"""
+        with self._transaction() as conn:
+            return self._allocate(conn, 1)[0]
+
+    def register(self, input_data, results=None):
+        """請求データを登録して登録番号を返す"""
+        return self.register_many([(input_data, results)])[0]
+
+    def register_many(self, records, batch_size=1000):
+        """(input_data, results) のイテラブルをまとめて登録し、登録番号のリストを返す"""
+        numbers = []
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                numbers.extend(self._insert_batch(batch))
+                batch = []
+        if batch:
+            numbers.extend(self._insert_batch(batch))
+        return numbers
+
+    def _insert_batch(self, batch):
+        now = _now()
+        with self._transaction() as conn:
+            numbers = self._allocate(conn, len(batch))
+            conn.executemany(
+                "INSERT INTO claims (reg_number, accident_date, grade, input_data, results, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (number, *_index_values(input_data), _dumps(input_data), _dumps(results), now, now)
+                    for number, (input_data, results) in zip(numbers, batch)
+                ]
+            )
+        return numbers
+
+    def update(self, reg_number, input_data, results=None):
+        """登録済みの請求データを更新（該当がなければ KeyError）"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE claims SET accident_date = ?, grade = ?, input_data = ?, results = ?, updated_at = ? "
+                "WHERE reg_number = ?",
+                (*_index_values(input_data), _dumps(input_data), _dumps(results), _now(), reg_number)
+            )
+            if cursor.rowcount == 0:
+                raise KeyError(reg_number)
+
+    def get(self, reg_number):
+        """登録番号で検索（該当がなければ None）"""
+        row = self._connection().execute(
+            "SELECT * FROM claims WHERE reg_number = ?", (str(reg_number),)
+        ).fetchone()
+        return self._to_record(row) if row is not None else None
+
+    def find_by_accident_date(self, start, end=None, limit=100):
+        """事故日（YYYY-MM-DD）の範囲で検索"""
+        rows = self._connection().execute(
+            "SELECT * FROM claims WHERE accident_date >= ? AND accident_date <= ? "
+            "ORDER BY accident_date, reg_number LIMIT ?",
+            (start, end or start, limit)
+        )
+        return [self._to_record(row) for row in rows]
+
+    def find_by_grade(self, grade, limit=100):
+        """後遺障害等級で検索"""
+        rows = self._connection().execute(
+            "SELECT * FROM claims WHERE grade = ? ORDER BY reg_number LIMIT ?", (grade, limit)
+        )
+        return [self._to_record(row) for row in rows]
+
+    def scan(self, after=None, limit=1000):
+        """登録番号順に、after より後の請求データを最大 limit 件取得（全件を順に処理する場合に使用）"""
+        rows = self._connection().execute(
+            "SELECT * FROM claims WHERE reg_number > ? ORDER BY reg_number LIMIT ?", (after or "", limit)
+        )
+        return [dict(self._to_record(row), grade=row["grade"]) for row in rows]
+
+    def update_results(self, items):
+        """(登録番号, 計算結果) のイテラブルで計算結果のみをまとめて更新"""
+        now = _now()
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE claims SET results = ?, updated_at = ? WHERE reg_number = ?",
+                [(_dumps(results), now, reg_number) for reg_number, results in items]
+            )
+
+    def count(self):
+        """登録件数"""
+        return self._connection().execute("SELECT COUNT(*) FROM claims").fetchone()[0]
+
+    @staticmethod
+    def _to_record(row):
+        return {
+            "登録番号": row["reg_number"],
+            "input_data": json.loads(row["input_data"]),
+            "results": json.loads(row["results"]) if row["results"] else None,
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+
+class _Transaction:
+    """書き込みロックを先に取得するトランザクション（BEGIN IMMEDIATE）"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
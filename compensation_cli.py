@@ -0,0 +1,108 @@
+"""損害賠償額の計算をコマンドラインから実行（JSONL / CSV のストリーム処理）
+
+使い方:
+    python -m compensation_cli claims.jsonl > results.jsonl
+    cat claims.csv | python -m compensation_cli - --format csv --output-format csv
+    python -m compensation_cli claims.jsonl --workers 8 --chunk-size 5000 -o results.jsonl
+"""
+import argparse
+import csv
+import itertools
+import json
+import sys
+
+from calculator import RESULT_FIELDS, shared_calculator
+from claim_io import ID_FIELD, InvalidClaim, claim_id, detect_format, read_claims
+from parallel import map_bounded
+
+
+def calculate_chunk(chunk):
+    """(識別子, 入力データ) のリストをまとめて計算し、結果の dict のリストを返す
+
+    入力に不備のある請求は error を設定した行とする（CompensationCalculator.calculate_claims）。
+    読み込めなかった行（InvalidClaim）も error の行とする。
+    """
+    invalid = {index: claim.error for index, (_, claim) in enumerate(chunk) if isinstance(claim, InvalidClaim)}
+    if invalid:
+        rows = iter(calculate_chunk([item for index, item in enumerate(chunk) if index not in invalid]))
+        return [
+            {ID_FIELD: name, "error": invalid[index]} if index in invalid else next(rows)
+            for index, (name, _) in enumerate(chunk)
+        ]
+
+    results = shared_calculator().calculate_claims([claim for _, claim in chunk])
+    columns = [results[field].tolist() for field in RESULT_FIELDS]
+    return [
+        {ID_FIELD: name, "error": error} if error is not None
+        else {ID_FIELD: name, **dict(zip(RESULT_FIELDS, values))}
+        for (name, _), values, error in zip(chunk, zip(*columns), results["error"])
+    ]
+
+
+def _chunks(claims, chunk_size):
+    """請求データを (識別子, 入力データ) のチャンクに分けて順に返す"""
+    numbered = ((claim_id(claim, index), claim) for index, claim in enumerate(claims, 1))
+    while True:
+        chunk = list(itertools.islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def calculate_stream(claims, chunk_size=1000, workers=1):
+    """請求データのイテラブルを計算し、結果を入力順に1件ずつ返すジェネレータ
+
+    workers が2以上の場合はチャンク単位で複数プロセスに分散する（parallel.map_bounded）。
+    """
+    for rows in map_bounded(calculate_chunk, _chunks(claims, chunk_size), workers):
+        yield from rows
+
+
+def write_results(results, stream, format="jsonl"):
+    """計算結果を順次書き出し、件数とエラー件数を返す"""
+    count = 0
+    errors = 0
+    if format == "csv":
+        writer = csv.DictWriter(stream, fieldnames=[ID_FIELD] + RESULT_FIELDS + ["error"])
+        writer.writeheader()
+    for row in results:
+        if format == "csv":
+            writer.writerow(row)
+        else:
+            stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+        count += 1
+        errors += "error" in row
+    stream.flush()
+    return count, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="請求データ（JSONL / CSV）から損害賠償額を計算します")
+    parser.add_argument("input", nargs="?", default="-", help="入力ファイル（省略時・'-' は標準入力）")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="入力形式（省略時は拡張子から判定）")
+    parser.add_argument("--output", "-o", default="-", help="出力ファイル（省略時は標準出力）")
+    parser.add_argument("--output-format", choices=["jsonl", "csv"], help="出力形式（省略時は入力形式と同じ）")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="一括計算する件数")
+    parser.add_argument("--workers", "-w", type=int, default=1, help="計算に使うプロセス数")
+    args = parser.parse_args(argv)
+
+    input_format = args.format or (detect_format(args.input) if args.input != "-" else "jsonl")
+    output_format = args.output_format or input_format
+
+    results = calculate_stream(
+        read_claims(args.input, input_format, errors="yield"),
+        chunk_size=args.chunk_size,
+        workers=args.workers
+    )
+    if args.output == "-":
+        count, errors = write_results(results, sys.stdout, output_format)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            count, errors = write_results(results, f, output_format)
+
+    print(f"{count}件を計算しました（エラー {errors}件）", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""PDF描画に使う日本語フォントの検索
+
+フォントディレクトリを走査してファミリー名・太さ・パスの索引を作り、キャッシュファイルに保存する。
+以降のプロセスはディレクトリに変更がなければ索引を読み込むだけで済む。
+
+    python -m font_registry            # 使用するフォントを表示
+    python -m font_registry --rescan   # 索引を作り直す
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+
+# 検索するディレクトリ（環境変数 SEKISAN_FONT_DIRS に os.pathsep 区切りで指定したものを優先）
+PLATFORM_FONT_DIRS = {
+    "darwin": ["/System/Library/Fonts", "/Library/Fonts", "~/Library/Fonts"],
+    "win32": [os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts")],
+    "linux": ["/usr/share/fonts", "/usr/local/share/fonts", "~/.local/share/fonts", "~/.fonts"],
+}
+
+# 使用するファミリー（優先順位順、環境変数 SEKISAN_FONT_FAMILIES に "," 区切りで指定したものを優先）
+PREFERRED_FAMILIES = [
+    "Hiragino Sans",
+    "Hiragino Kaku Gothic ProN",
+    "Noto Sans CJK JP",
+    "Noto Sans JP",
+    "Source Han Sans JP",
+    "IPAexGothic",
+    "IPAGothic",
+    "TakaoGothic",
+    "Yu Gothic",
+    "Meiryo",
+    "AppleGothic",
+]
+
+FONT_EXTENSIONS = (".ttf", ".ttc", ".otf", ".otc")
+
+# スタイル名 → 太さ（CSS の font-weight に準じる）。ヒラギノの W0〜W9 は W × 100 とする
+STYLE_WEIGHTS = {
+    "thin": 100, "extralight": 200, "ultralight": 200, "light": 300,
+    "regular": 400, "normal": 400, "book": 400, "roman": 400,
+    "medium": 500, "semibold": 600, "demibold": 600, "bold": 700,
+    "extrabold": 800, "ultrabold": 800, "heavy": 900, "black": 900,
+}
+
+# 太字とみなす太さの下限
+BOLD_WEIGHT = 600
+
+INDEX_VERSION = 1
+
+
+def default_cache_path():
+    """索引のキャッシュファイル（環境変数 SEKISAN_FONT_CACHE で変更可）"""
+    if os.environ.get("SEKISAN_FONT_CACHE"):
+        return os.environ["SEKISAN_FONT_CACHE"]
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "sekisan", "font_index.json")
+
+
+def default_directories():
+    configured = [path for path in os.environ.get("SEKISAN_FONT_DIRS", "").split(os.pathsep) if path]
+    platform_dirs = PLATFORM_FONT_DIRS.get(sys.platform, PLATFORM_FONT_DIRS["linux"])
+    return [os.path.expanduser(path) for path in configured + platform_dirs]
+
+
+def default_families():
+    configured = [name.strip() for name in os.environ.get("SEKISAN_FONT_FAMILIES", "").split(",") if name.strip()]
+    return configured + PREFERRED_FAMILIES
+
+
+def style_weight(style):
+    """スタイル名（"Bold", "W6" など）から太さを推定"""
+    compact = style.lower().replace(" ", "").replace("-", "")
+    if len(compact) == 2 and compact[0] == "w" and compact[1].isdigit():
+        return int(compact[1]) * 100
+    for name, weight in sorted(STYLE_WEIGHTS.items(), key=lambda item: -len(item[0])):
+        if name in compact:
+            return weight
+    return 400
+
+
+def _read_font(path):
+    """フォントファイルのファミリー名とスタイル名（読めなければ None）"""
+    from PIL import ImageFont
+
+    try:
+        family, style = ImageFont.truetype(path, 10).getname()
+    except (OSError, ValueError):
+        return None
+    return {"path": path, "family": family, "style": style or "", "weight": style_weight(style or "")}
+
+
+class FontRegistry:
+    """フォントの索引（ファミリー名・太さ・パス）
+
+    索引はキャッシュファイルに保存し、検索対象のディレクトリの更新日時が変わった場合のみ作り直す。
+    """
+
+    def __init__(self, directories=None, cache_path=None, families=None):
+        self.directories = directories if directories is not None else default_directories()
+        self.cache_path = cache_path or default_cache_path()
+        self.families = families if families is not None else default_families()
+        self._fonts = None
+
+    def _signature(self):
+        """検索対象ディレクトリの構成（サブディレクトリを含む各ディレクトリの更新日時）
+
+        ファイルの追加・削除でディレクトリの更新日時が変わるため、フォントファイルは開かずに変更を検出できる。
+        """
+        signature = {}
+        for directory in self.directories:
+            for root, _, _ in os.walk(directory, followlinks=True):
+                signature.setdefault(root, os.stat(root).st_mtime)
+        return signature
+
+    def _load_cache(self, signature):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get("version") != INDEX_VERSION or index.get("directories") != signature:
+            return None
+        return index["fonts"]
+
+    def _save_cache(self, signature, fonts):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "directories": signature, "fonts": fonts}, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            # キャッシュに書けなくても検索結果はそのまま使える
+            print(f"フォント索引を保存できません: {e}", file=sys.stderr)
+
+    def scan(self):
+        """ディレクトリを走査して索引を作り直す"""
+        signature = self._signature()
+        fonts = []
+        seen = set()
+        for directory in self.directories:
+            for root, _, names in os.walk(directory, followlinks=True):
+                for name in sorted(names):
+                    path = os.path.join(root, name)
+                    if not name.lower().endswith(FONT_EXTENSIONS) or path in seen:
+                        continue
+                    seen.add(path)
+                    font = _read_font(path)
+                    if font is not None:
+                        fonts.append(font)
+        self._save_cache(signature, fonts)
+        self._fonts = fonts
+        return fonts
+
+    def fonts(self):
+        """索引（{"path", "family", "style", "weight"} のリスト）"""
+        if self._fonts is None:
+            fonts = self._load_cache(self._signature())
+            # キャッシュ作成後に削除されたフォントがあれば作り直す
+            if fonts is None or not all(os.path.exists(font["path"]) for font in fonts):
+                fonts = self.scan()
+            self._fonts = fonts
+        return self._fonts
+
+    def find(self, family, weight=400):
+        """ファミリー内で指定した太さに最も近いフォントのパス（なければ None）"""
+        faces = [font for font in self.fonts() if font["family"] == family]
+        if not faces:
+            return None
+        return min(faces, key=lambda font: (abs(font["weight"] - weight), font["weight"]))["path"]
+
+    def resolve(self):
+        """使用するフォントのパス（本文用, 太字用）
+
+        優先順位の最も高いファミリーから本文用を選び、同じファミリーの太字があれば太字用とする。
+        本文用が見つからなければ ValueError、太字用がなければ None を返す。
+        """
+        for family in self.families:
+            regular = self.find(family, 400)
+            if regular is None:
+                continue
+            bold = self.find(family, 700)
+            bold_weight = next(font["weight"] for font in self.fonts() if font["path"] == bold)
+            return regular, (bold if bold != regular and bold_weight >= BOLD_WEIGHT else None)
+        raise ValueError(
+            "適切なフォントが見つかりません（SEKISAN_FONT_DIRS でフォントのディレクトリ、"
+            "SEKISAN_FONT_FAMILIES でファミリー名を指定できます）"
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def get_registry():
+    """プロセスで共有するフォントの索引"""
+    return FontRegistry()
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_font_paths():
+    """使用するフォントのパス（本文用, 太字用）を返す（解決はプロセスで1回のみ）"""
+    return get_registry().resolve()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PDF描画に使う日本語フォントの検索")
+    parser.add_argument("--rescan", action="store_true", help="キャッシュを使わずに索引を作り直す")
+    parser.add_argument("--list", action="store_true", help="索引のフォントをすべて表示")
+    args = parser.parse_args(argv)
+
+    registry = get_registry()
+    fonts = registry.scan() if args.rescan else registry.fonts()
+    if args.list:
+        for font in fonts:
+            print(f"{font['family']}\t{font['style']}\t{font['weight']}\t{font['path']}")
+    print(f"索引: {registry.cache_path}（{len(fonts)}件）", file=sys.stderr)
+    try:
+        regular, bold = registry.resolve()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"本文用: {regular}")
+    print(f"太字用: {bold or '（なし、本文用で代用）'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+from contextvars import ContextVar
+import sys
+import threading
+import time
+import tracemalloc
+
+# 計測中のトレース（スレッド・非同期タスクごと）
+_current_trace = ContextVar("sekisan_trace", default=None)
+
+# 完了したトレースの送り先（メトリクス基盤への送信など）
+_sinks = []
+
+# tracemalloc はプロセス全体で1つのため、メモリを計測するトレースは同時に1つまでとする
+_memory_lock = threading.Lock()
+
+
+def add_sink(sink):
+    """トレース完了時に呼び出す関数を登録（引数は Trace.as_dict() の結果）"""
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    """登録した送り先を解除"""
+    _sinks.remove(sink)
+
+
+def emit(record):
+    """完了したトレース（Trace.as_dict() の結果）を登録済みの送り先に渡す
+
+    ワーカープロセスで計測したトレースは、結果とともに受け取った側でこの関数に渡す。
+    送り先で起きた例外は計測対象の処理に影響させず、標準エラーに出力するのみとする。
+    """
+    for sink in list(_sinks):
+        try:
+            sink(record)
+        except Exception as e:
+            print(f"トレースの送信に失敗しました（{record['name']}）: {type(e).__name__}: {e}", file=sys.stderr)
+
+
+class Trace:
+    """1回の処理（計算・PDF生成など）の段階別の所要時間
+
+    同じ名前の区間は回数と合計時間にまとめる。
+    memory=True の場合、tracemalloc でピークを記録する。このトレースで tracemalloc を開始した場合は
+    終了時に止める（既に他から開始されていた場合はそのまま）。
+    他のトレースがメモリを計測中の場合は計測せず、memory_peak は None のままとする。
+    """
+
+    def __init__(self, name, memory=False):
+        self.name = name
+        self.memory = memory
+        self.spans = {}
+        self.total = None
+        self.memory_peak = None
+        self._started = None
+        self._token = None
+        self._measuring_memory = False
+        self._started_tracemalloc = False
+
+    def add(self, name, seconds):
+        count, total = self.spans.get(name, (0, 0.0))
+        self.spans[name] = (count + 1, total + seconds)
+
+    def __enter__(self):
+        if self.memory and _memory_lock.acquire(blocking=False):
+            self._measuring_memory = True
+            self._started_tracemalloc = not tracemalloc.is_tracing()
+            if self._started_tracemalloc:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        self._token = _current_trace.set(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.total = time.perf_counter() - self._started
+        _current_trace.reset(self._token)
+        if self._measuring_memory:
+            self.memory_peak = tracemalloc.get_traced_memory()[1]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+            self._measuring_memory = False
+            _memory_lock.release()
+        if _sinks:
+            emit(self.as_dict())
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "total": self.total,
+            "spans": {name: {"count": count, "seconds": seconds} for name, (count, seconds) in self.spans.items()},
+            "memory_peak": self.memory_peak,
+        }
+
+
+def trace(name, memory=False):
+    """処理全体の計測を開始（with 文で使用、memory=True でメモリ使用量のピークも記録）"""
+    return Trace(name, memory)
+
+
+class span:
+    """処理の一区間の所要時間を計測（with 文で使用）
+
+    計測中のトレースがなければ何もしないため、常時埋め込んでおける。
+    """
+
+    __slots__ = ("name", "_trace", "_started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._trace = _current_trace.get()
+        if self._trace is not None:
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self._trace is not None:
+            self._trace.add(self.name, time.perf_counter() - self._started)
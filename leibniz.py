@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+
+from caching import LRUCache
+
+# 就労可能年数の上限年齢
+RETIREMENT_AGE = 67
+
+# 事前計算する割引率（5%: 旧法定利率、3%: 現行法定利率）
+DEFAULT_RATES = (0.05, 0.03)
+
+# rates 以外の割引率（一括計算の "割引率" 列など）の係数表を保持する件数
+EXTRA_RATES_CACHE_SIZE = 32
+
+
+def leibnitz_coefficient(years, rate=0.05):
+    """ライプニッツ係数を計算"""
+    if years <= 0:
+        return 0
+    return (1 - math.pow(1 + rate, -years)) / rate
+
+
+class LeibnizTable:
+    """年齢別の就労可能年数とライプニッツ係数を配列で保持するテーブル
+
+    年齢（0〜max_age歳）を添字とした配列を割引率ごとに事前計算し、
+    係数の取得を配列の添字参照だけで済ませる。
+    overrides には {割引率: {年齢: 係数}} の形式で公表値などの固定値を指定できる。
+    rates 以外の割引率の係数表は参照時に作成し、最近使用した extra_rates 件まで保持する。
+    """
+
+    def __init__(self, rates=DEFAULT_RATES, max_age=RETIREMENT_AGE, overrides=None,
+                 extra_rates=EXTRA_RATES_CACHE_SIZE):
+        self.max_age = max_age
+        self.overrides = overrides or {}
+        self.years = max_age - np.arange(max_age + 1)
+        self.years.flags.writeable = False
+        self._coefficients = {}
+        self._coefficient_lists = {}
+        for rate in rates:
+            self._coefficients[rate], self._coefficient_lists[rate] = self._build(rate)
+        self._extra = LRUCache(maxsize=extra_rates)
+
+    @property
+    def rates(self):
+        """テーブル化済みの割引率"""
+        return tuple(self._coefficients)
+
+    def _build(self, rate):
+        """割引率に対応する年齢別係数の配列と、単一年齢の参照用のリスト（numpy スカラーを経由しない）"""
+        table = np.array([leibnitz_coefficient(years, rate) for years in self.years], dtype=float)
+        for age, coefficient in self.overrides.get(rate, {}).items():
+            if 0 <= age <= self.max_age:
+                table[age] = coefficient
+        table.flags.writeable = False
+        return table, table.tolist()
+
+    def _tables(self, rate):
+        if rate in self._coefficients:
+            return self._coefficients[rate], self._coefficient_lists[rate]
+        return self._extra.get_or_create(rate, lambda: self._build(rate))
+
+    def coefficients(self, rate):
+        """割引率に対応する年齢別係数の配列（rates 以外の割引率は必要に応じて作成）"""
+        return self._tables(rate)[0]
+
+    def coefficient(self, age, rate=0.05):
+        """事故時年齢に対応するライプニッツ係数を取得"""
+        if age > self.max_age:
+            return 0
+        if age >= 0 and age == int(age):
+            coefficients = self._coefficient_lists.get(rate)
+            if coefficients is None:
+                coefficients = self._tables(rate)[1]
+            return coefficients[int(age)]
+        return leibnitz_coefficient(max(self.max_age - age, 0), rate)
+
+    def lookup(self, ages, rate=0.05):
+        """年齢の配列に対応するライプニッツ係数をまとめて取得"""
+        ages = np.asarray(ages, dtype=float)
+        table = self.coefficients(rate)
+        result = np.zeros(ages.shape, dtype=float)
+
+        indexed = (ages >= 0) & (ages <= self.max_age) & (ages == np.floor(ages))
+        result[indexed] = table[ages[indexed].astype(np.int64)]
+
+        # 端数のある年齢・負の年齢は個別に計算
+        irregular = ~indexed & (ages <= self.max_age)
+        if irregular.any():
+            result[irregular] = [
+                leibnitz_coefficient(self.max_age - age, rate) for age in ages[irregular]
+            ]
+        return result
@@ -0,0 +1,25 @@
+"""チャンク単位の処理を複数プロセスに分散し、結果を入力順に返す"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def map_bounded(function, items, workers=1):
+    """function(item) を items の順に実行し、結果を順に返すジェネレータ
+
+    workers が2以上の場合は複数プロセスで実行する。処理中の件数を workers の2倍までに制限し、
+    結果を受け取った分だけ次の item を依頼するため、items 全体を読み込まずに処理する。
+    function にはワーカープロセスに渡せる関数（モジュールの関数や functools.partial）を指定する。
+    """
+    if workers <= 1:
+        for item in items:
+            yield function(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(function, item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -1,180 +1,471 @@
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
-from datetime import datetime
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfdoc
+from datetime import date, datetime
 from PIL import Image, ImageDraw, ImageFont
+import copy
+import hashlib
+import io
+import json
 import os
-import tempfile
+import zlib
+
+from caching import LRUCache
+from font_registry import resolve_font_paths
+from instrumentation import span
+
+# フォントを埋め込めない場合（CFF アウトラインの .ttc など）に使う CID フォント
+FALLBACK_CID_FONT = 'HeiseiKakuGo-W5'
+
+# ご案内の定型文（請求ごとに変わらない部分）
+DEFAULT_TEMPLATE = {
+    "title": "賠償責任額に関するご案内",
+    "greeting": [
+        "拝啓",
+        "",
+        "平素より格別のお引き立てを賜り、厚く御礼申し上げます。",
+        "この度の事故により被られたご負傷とご不便について、心よりお見舞い申し上げます。",
+        "ご請求いただきました損害賠償につきまして、現時点でのご提示金額を以下の通り",
+        "ご案内させていただきます。",
+        "",
+        "■ご確認事項",
+        ""
+    ],
+    "amount_header": "■賠償金額の内訳",
+    "notes": [
+        "■ご留意事項",
+        "",
+        "・本書面の金額は、現時点でご提供いただいた資料に基づく概算額でございます。",
+        "・今後の治療経過や後遺障害の認定等により、金額が変動する可能性がございます。",
+        "・ご不明な点やご心配な点がございましたら、担当者までお気軽にご相談ください。",
+        "・お客様の回復と今後の生活再建を第一に考え、誠意を持って対応させていただきます。",
+        "",
+        "なお、本件に関しまして、ご不明な点やご質問等ございましたら、",
+        "担当者まで遠慮なくお申し付けください。",
+        "",
+        "私どもは、お客様の一日も早いご回復を心よりお祈り申し上げております。",
+        "",
+        "敬具"
+    ],
+    "footer": "担当者連絡先：TEL: 03-XXXX-XXXX（平日 9:00-17:00）",
+}
+
+# ご案内のレイアウトの版（描画内容を変更したら上げ、保存済みのPDFを無効にする）
+LAYOUT_VERSION = 2
+
+# ラスター画像の色数（rgb: フルカラー、gray: 8ビットグレースケール、bilevel: 1ビット白黒）
+RASTER_COLORS = ("rgb", "gray", "bilevel")
+
+# 白黒画像で黒とする明るさの上限（0〜255、細い線を残すため中間値より白寄りにする）
+BILEVEL_THRESHOLD = 200
+
+# 基本情報の行数（事故発生日・ご本人様・年齢）
+INFO_ITEM_COUNT = 3
+
+# 登録済みのベクターフォント（フォントパス → reportlab のフォント名）
+_vector_fonts = {}
+
+# 読み込み済みのフォント（(パス, サイズ, 太さ) → ImageFont）。全インスタンスで共有
+_font_cache = LRUCache(maxsize=32)
+
+
+def load_font(path, size, weight="regular"):
+    """ラスター描画用のフォントを読み込む（読み込み結果はキャッシュ）"""
+    def load():
+        with span("フォント読み込み"):
+            return ImageFont.truetype(path, size)
+
+    return _font_cache.get_or_create((path, size, weight), load)
+
+
+def register_vector_font(path):
+    """フォントを reportlab に登録してフォント名を返す（登録はプロセスで1回のみ）"""
+    if path not in _vector_fonts:
+        name = f"Sekisan-{os.path.splitext(os.path.basename(path))[0]}"
+        try:
+            # TrueType はサブセットのみ埋め込まれる
+            pdfmetrics.registerFont(TTFont(name, path, subfontIndex=0))
+        except TTFError:
+            if FALLBACK_CID_FONT not in pdfmetrics.getRegisteredFontNames():
+                pdfmetrics.registerFont(UnicodeCIDFont(FALLBACK_CID_FONT))
+            name = FALLBACK_CID_FONT
+        _vector_fonts[path] = name
+    return _vector_fonts[path]
+
+
+class EncodedImage:
+    """PDF に埋め込む形式に圧縮済みのグレースケール・白黒画像（内容のハッシュ値を名前とする）"""
+
+    __slots__ = ("name", "width", "height", "bits", "data")
+
+    def __init__(self, image):
+        raw = image.tobytes()
+        self.width, self.height = image.size
+        # PIL の 1 ビット画像は 1 = 白で、PDF の DeviceGray と同じ並び
+        self.bits = 1 if image.mode == "1" else 8
+        self.name = hashlib.sha1(b"%d:%d:%d:" % (self.width, self.height, self.bits) + raw).hexdigest()
+        self.data = zlib.compress(raw, 9)
+
+
+def draw_encoded_image(c, encoded, x, y, width, height):
+    """圧縮済みの画像を描画（同じ内容の画像は文書内で1回だけ埋め込む）
+
+    reportlab の drawImage は画像を RGB か 8 ビットに変換し、描画のたびに内容のハッシュ値を計算するため、
+    ここでは圧縮済みのデータから画像 XObject を直接登録する。reportlab の内部の属性を使うため、
+    requirements.txt で動作を確認した版に固定している（版を上げる場合は gray / bilevel の出力を確認すること）。
+    """
+    registered_name = c._doc.getXObjectName(encoded.name)
+    if registered_name not in c._doc.idToObject:
+        image = pdfdoc.PDFImageXObject(encoded.name)
+        image.width = encoded.width
+        image.height = encoded.height
+        image.bitsPerComponent = encoded.bits
+        image.colorSpace = "DeviceGray"
+        image.streamContent = encoded.data
+        image._filters = ("FlateDecode",)
+        c._setXObjects(image)
+        c._doc.Reference(image, registered_name)
+        c._doc.addForm(encoded.name, image)
+
+    c._currentPageHasImages = 1
+    c.saveState()
+    c.translate(x, y)
+    c.scale(width, height)
+    c._code.append(f"/{registered_name} Do")
+    c.restoreState()
+    c._formsinuse.append(encoded.name)
+
 
 class CompensationPDFGenerator:
-    def __init__(self):
-        # フォントパスの設定（優先順位順）
-        font_paths = [
-            '/System/Library/Fonts/ヒラギノ角ゴシック W4.ttc',  # 読みやすい太さ
-            '/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc',  # 代替
-            '/System/Library/Fonts/AppleGothic.ttf',           # 最終代替
-        ]
-        
-        self.font_path = None
-        for path in font_paths:
-            if os.path.exists(path):
-                self.font_path = path
-                break
-        
-        if self.font_path is None:
-            raise ValueError("適切なフォントが見つかりません")
+    def __init__(self, text_mode="raster", text_cache_size=256,
+                 raster_color="rgb", raster_scale=3, raster_resolution=1):
+        # テキストの描画方式（raster: 画像として埋め込み、vector: フォントで直接描画）
+        if text_mode not in ("raster", "vector"):
+            raise ValueError(f"不明なテキスト描画方式です: {text_mode}")
+        self.text_mode = text_mode
+
+        # ラスター画像の設定
+        # raster_color: 色数（RASTER_COLORS）。gray / bilevel は圧縮済みのデータを画像ごとにキャッシュする
+        # raster_scale: 描画時の拡大率（拡大して描画してから縮小し、文字の品質を上げる）
+        # raster_resolution: 埋め込む画像の解像度（レイアウト上のピクセル数に対する倍率）
+        if raster_color not in RASTER_COLORS:
+            raise ValueError(f"不明なラスター画像の色数です: {raster_color}")
+        self.raster_color = raster_color
+        self.raster_scale = raster_scale
+        self.raster_resolution = raster_resolution
+
+        # 描画済みテキスト画像のキャッシュ（定型文は2通目以降の描画を省略）
+        self.text_image_cache = LRUCache(maxsize=text_cache_size)
+
+        # 定型文と、そのレイアウトのキャッシュ（テンプレートの内容ごと）
+        self.template = copy.deepcopy(DEFAULT_TEMPLATE)
+        self._static_layouts = {}
+
+        # フォントパスの設定（font_registry で解決、太字用がなければ本文用で代用）
+        self.font_path, self.bold_font_path = resolve_font_paths()
 
     def create_text_image(self, text, font_size, width, height, bold=False):
-        """テキストを画像として生成"""
+        """テキストを画像として生成（同じ内容の画像はキャッシュから返す）
+
+        返す画像はキャッシュと共有されるため、呼び出し側で変更しないこと。
+        """
+        return self.text_image_cache.get_or_create(
+            (text, font_size, width, height, bold),
+            lambda: self._render_text_image(text, font_size, width, height, bold)
+        )
+
+    def create_encoded_text_image(self, text, font_size, width, height, bold=False):
+        """テキストの画像を圧縮済みの形式で生成（raster_color が gray / bilevel の場合）
+
+        キャッシュには圧縮済みの形式のみを保持し、描画した画像は圧縮後に破棄する。
+        """
+        def encode():
+            image = self._render_text_image(text, font_size, width, height, bold)
+            with span("画像の圧縮"):
+                return EncodedImage(image)
+
+        return self.text_image_cache.get_or_create((text, font_size, width, height, bold, "encoded"), encode)
+
+    def _render_text_image(self, text, font_size, width, height, bold=False):
+        """テキストを画像として描画"""
+        # 埋め込む画像のピクセル数（レイアウト上のピクセル数 × 解像度の倍率）
+        width = round(width * self.raster_resolution)
+        height = round(height * self.raster_resolution)
+        font_size = font_size * self.raster_resolution
+
         # 高DPIで作成して縮小することで、文字の品質を向上
-        scale = 3
-        img = Image.new('RGB', (width * scale, height * scale), 'white')
+        scale = self.raster_scale
+        mode, background, fill = ('RGB', 'white', 'black') if self.raster_color == "rgb" else ('L', 255, 0)
+        img = Image.new(mode, (width * scale, height * scale), background)
         draw = ImageDraw.Draw(img)
         
-        if bold and os.path.exists('/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc'):
-            font = ImageFont.truetype('/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc', font_size * scale)
+        if bold and self.bold_font_path:
+            font = load_font(self.bold_font_path, font_size * scale, "bold")
         else:
-            font = ImageFont.truetype(self.font_path, font_size * scale)
-        
-        # テキストのサイズを取得
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
+            font = load_font(self.font_path, font_size * scale)
         
-        # テキストを中央に配置
-        x = (width * scale - text_width) // 2
-        y = (height * scale - text_height) // 2
-        
-        draw.text((x, y), text, font=font, fill='black')
+        with span("テキスト描画"):
+            # テキストのサイズを取得
+            bbox = draw.textbbox((0, 0), text, font=font)
+            text_width = bbox[2] - bbox[0]
+            text_height = bbox[3] - bbox[1]
+            
+            # テキストを中央に配置
+            x = (width * scale - text_width) // 2
+            y = (height * scale - text_height) // 2
+            
+            draw.text((x, y), text, font=font, fill=fill)
         
         # 高DPI画像を適切なサイズに縮小
-        img = img.resize((width, height), Image.Resampling.LANCZOS)
+        with span("縮小（LANCZOS）"):
+            img = img.resize((width, height), Image.Resampling.LANCZOS)
+        if self.raster_color == "bilevel":
+            # 誤差拡散は使わず、黒寄りのしきい値で白黒に分ける
+            # （中間の明るさで分けると、縮小で薄くなった "-" や ":" などの細い線が消える）
+            img = img.point(lambda value: 0 if value < BILEVEL_THRESHOLD else 255, "1")
         return img
 
-    def generate_pdf(self, calculation_data, input_data, filename):
-        c = canvas.Canvas(filename, pagesize=A4)
-        width, height = A4
-
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # ヘッダー（タイトル）
-            header = self.create_text_image("賠償責任額に関するご案内", 24, 400, 40, bold=True)
-            header_path = os.path.join(temp_dir, "header.png")
-            header.save(header_path)
-            c.drawImage(header_path, 30*mm, 277*mm, width=150*mm, height=10*mm)
-
-            # 日付
-            date_text = f"作成日: {datetime.now().strftime('%Y年%m月%d日')}"
-            date_img = self.create_text_image(date_text, 10, 200, 20)
-            date_path = os.path.join(temp_dir, "date.png")
-            date_img.save(date_path)
-            c.drawImage(date_path, 130*mm, 270*mm, width=60*mm, height=5*mm)
-
-            # 本文
-            content = [
-                "拝啓",
-                "",
-                "平素より格別のお引き立てを賜り、厚く御礼申し上げます。",
-                "この度の事故により被られたご負傷とご不便について、心よりお見舞い申し上げます。",
-                "ご請求いただきました損害賠償につきまして、現時点でのご提示金額を以下の通り",
-                "ご案内させていただきます。",
-                "",
-                "■ご確認事項",
-                ""
-            ]
-
-            y_position = 255
-            for line in content:
-                if line == "":
-                    y_position -= 5
-                    continue
-                
-                is_header = line.startswith("■")
-                temp_path = os.path.join(temp_dir, f"text_{y_position}.png")
-                text_img = self.create_text_image(line, 12, 500, 20, bold=is_header)
-                text_img.save(temp_path)
-                c.drawImage(temp_path, 25*mm, y_position*mm, width=160*mm, height=5*mm)
-                y_position -= 7
-
-            # 基本情報
-            info_items = [
+    def warm_up(self):
+        """フォントの読み込みと定型文の描画を事前に済ませる"""
+        sample_input = {"基本情報": {"事故日": "2000-01-01", "性別": "", "事故時年齢": 0}}
+        self.generate_pdf({}, sample_input)
+
+    def cache_stats(self):
+        """フォントとテキスト画像のキャッシュのヒット・ミス件数"""
+        return {"fonts": _font_cache.stats(), "text_images": self.text_image_cache.stats()}
+
+    def _vector_font_name(self, bold=False):
+        """ベクター描画に使うフォント名を取得"""
+        if bold and self.bold_font_path:
+            return register_vector_font(self.bold_font_path)
+        return register_vector_font(self.font_path)
+
+    def draw_text(self, c, text, font_size, image_width, image_height,
+                  x, y, width, height, bold=False):
+        """テキストを枠 (x, y, width, height) の中央に描画
+
+        image_width/image_height はラスター画像のピクセルサイズで、
+        ベクター描画でもこの比率から文字サイズと横方向の倍率を求めて同じ見た目にする。
+        """
+        if self.text_mode == "vector":
+            with span("フォント登録"):
+                font_name = self._vector_font_name(bold)
+            scale_x = width / image_width
+            scale_y = height / image_height
+            size = font_size * scale_y
+            horizontal_scale = scale_x / scale_y
+            text_width = pdfmetrics.stringWidth(text, font_name, size) * horizontal_scale
+
+            text_object = c.beginText()
+            text_object.setFont(font_name, size)
+            text_object.setHorizScale(horizontal_scale * 100)
+            # 文字の縦方向の中心を枠の中心に合わせる
+            text_object.setTextOrigin(x + (width - text_width) / 2, y + (height - size * 0.76) / 2)
+            text_object.textOut(text)
+            c.drawText(text_object)
+            return
+
+        if self.raster_color != "rgb":
+            encoded = self.create_encoded_text_image(text, font_size, image_width, image_height, bold=bold)
+            with span("画像の埋め込み"):
+                draw_encoded_image(c, encoded, x, y, width, height)
+            return
+
+        image = self.create_text_image(text, font_size, image_width, image_height, bold=bold)
+        with span("画像の埋め込み"):
+            c.drawImage(ImageReader(image), x, y, width=width, height=height)
+
+    def generate_pdf(self, calculation_data, input_data, filename=None, issue_date=None):
+        """賠償責任額のご案内PDFを生成してバイト列を返す
+
+        filename にはファイルパスまたはファイルライクオブジェクトを指定でき、
+        省略した場合はメモリ上でのみ生成する。
+        issue_date は作成日として印字する日付（省略時は当日）。
+        """
+        content = self._letter_content(calculation_data, input_data, issue_date)
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=A4)
+        self._draw_letter(c, content)
+        with span("保存（c.save）"):
+            c.save()
+        return self._write_output(buffer, filename)
+
+    def generate_merged_pdf(self, letters, output, issue_date=None):
+        """複数件のご案内を1つのPDFにまとめて output（ファイルパスまたはファイルライクオブジェクト）に書き出す
+        （差し込み印刷用）
+
+        letters は (calculation_data, input_data) のイテラブルで、1件ずつ読み込んでページを追加する。
+        同じ内容のテキスト画像とフォントは文書内で1回だけ埋め込まれ、各ページから参照される。
+        入力データに不備のあるご案内はページを作らずに飛ばし、残りのページを出力する。
+        reportlab は保存時にまとめて書き出すため、1ファイルの件数が多いほど使用メモリは増える
+        （件数が多い場合は呼び出し側でファイルを分ける）。
+        戻り値は {"pages": ページ数, "failed": [(letters 内の位置, エラー内容), ...]}。
+        """
+        # ページ単位で圧縮し、件数が多くても保持するページ内容を小さく抑える
+        c = canvas.Canvas(output, pagesize=A4, pageCompression=1)
+        summary = {"pages": 0, "failed": []}
+        for position, (calculation_data, input_data) in enumerate(letters):
+            try:
+                content = self._letter_content(calculation_data, input_data, issue_date)
+            except Exception as e:
+                summary["failed"].append((position, f"{type(e).__name__}: {e}"))
+                continue
+            self._draw_letter(c, content)
+            c.showPage()
+            summary["pages"] += 1
+        with span("保存（c.save）"):
+            c.save()
+        return summary
+
+    def _write_output(self, buffer, filename):
+        """生成したPDFを出力先に書き出してバイト列を返す"""
+        pdf_bytes = buffer.getvalue()
+        if hasattr(filename, "write"):
+            filename.write(pdf_bytes)
+        elif filename is not None:
+            with open(filename, "wb") as f:
+                f.write(pdf_bytes)
+        return pdf_bytes
+
+    def fingerprint(self):
+        """出力に影響する設定（レイアウトの版・テンプレート・描画方式・フォント）を表すハッシュ値"""
+        source = json.dumps([
+            LAYOUT_VERSION, self.template, self.text_mode, self.raster_color, self.raster_scale,
+            self.raster_resolution, self.font_path, self.bold_font_path
+        ], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+    def _template_key(self):
+        """定型部分の内容（テンプレートと描画方式）を表すキー"""
+        source = json.dumps([self.text_mode, self.template], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+    def _static_layout(self):
+        """定型部分の描画内容とレイアウトを取得（テンプレートが変わった場合のみ作り直す）
+
+        draw_text に渡す引数の一覧を、ページ上部の定型部分（head）と
+        金額の内訳の後に続く注意事項（notes、先頭を y=0 とした相対位置）に分けて保持する。
+        """
+        key = self._template_key()
+        layout = self._static_layouts.get(key)
+        if layout is not None:
+            return layout
+
+        template = self.template
+        head = [(template["title"], 24, 400, 40, 30*mm, 277*mm, 150*mm, 10*mm, True)]
+
+        # 本文
+        y_position = 255
+        for line in template["greeting"]:
+            if line == "":
+                y_position -= 5
+                continue
+            head.append((line, 12, 500, 20, 25*mm, y_position*mm, 160*mm, 5*mm, line.startswith("■")))
+            y_position -= 7
+
+        # 基本情報（請求ごとに描画）
+        info_y = y_position
+        y_position -= 7 * INFO_ITEM_COUNT
+        y_position -= 10
+
+        # 賠償金額の見出し
+        head.append((template["amount_header"], 12, 500, 30, 25*mm, y_position*mm, 160*mm, 6*mm, True))
+        amount_y = y_position - 12
+
+        # フッター
+        head.append((template["footer"], 10, 500, 30, 25*mm, 15*mm, 160*mm, 6*mm, False))
+
+        # 注意事項
+        notes = []
+        y_position = 0
+        for note in template["notes"]:
+            if note == "":
+                y_position -= 5
+                continue
+            notes.append((note, 11, 500, 30, 25*mm, y_position*mm, 160*mm, 6*mm, note.startswith("■")))
+            y_position -= 7
+
+        layout = {
+            "head_form": f"LetterHead_{key}",
+            "notes_form": f"LetterNotes_{key}",
+            "head": head,
+            "notes": notes,
+            "info_y": info_y,
+            "amount_y": amount_y,
+        }
+        # 古いテンプレートの内容は破棄する
+        self._static_layouts = {key: layout}
+        return layout
+
+    def _define_static_forms(self, c, layout):
+        """定型部分をフォーム XObject として文書に登録（1文書につき1回）"""
+        height = A4[1]
+        for form_name, operations in ((layout["head_form"], layout["head"]),
+                                      (layout["notes_form"], layout["notes"])):
+            if c.hasForm(form_name):
+                continue
+            # notes は負の座標に描画するため、ページ1枚分下まで範囲に含める
+            c.beginForm(form_name, lowery=-height, uppery=height)
+            for operation in operations:
+                self.draw_text(c, *operation)
+            c.endForm()
+
+    def _letter_content(self, calculation_data, input_data, issue_date=None):
+        """1件分のご案内で請求ごとに変わるテキスト（作成日・基本情報・金額）
+
+        入力データの不備はここで例外となるため、描画を始める前に検出できる。
+        """
+        return {
+            "date": f"作成日: {(issue_date or date.today()).strftime('%Y年%m月%d日')}",
+            "info": [
                 f"事故発生日: {datetime.strptime(input_data['基本情報']['事故日'], '%Y-%m-%d').strftime('%Y年%m月%d日')}",
                 f"ご本人様: {input_data['基本情報']['性別']}",
                 f"年齢: {input_data['基本情報']['事故時年齢']}歳"
-            ]
-
-            for item in info_items:
-                temp_path = os.path.join(temp_dir, f"info_{y_position}.png")
-                text_img = self.create_text_image(item, 11, 500, 30)
-                text_img.save(temp_path)
-                c.drawImage(temp_path, 35*mm, y_position*mm, width=150*mm, height=6*mm)
-                y_position -= 7
-
-            y_position -= 10
-
-            # 賠償金額
-            header_text = "■賠償金額の内訳"
-            header_img = self.create_text_image(header_text, 12, 500, 30, bold=True)
-            header_path = os.path.join(temp_dir, "amount_header.png")
-            header_img.save(header_path)
-            c.drawImage(header_path, 25*mm, y_position*mm, width=160*mm, height=6*mm)
-            
-            y_position -= 12
-
-            # 金額項目
-            for item, amount in calculation_data.items():
-                if isinstance(amount, int):
-                    item_path = os.path.join(temp_dir, f"item_{y_position}.png")
-                    amount_path = os.path.join(temp_dir, f"amount_{y_position}.png")
-                    
-                    item_img = self.create_text_image(item, 11, 300, 30)
-                    amount_text = f"¥{amount:,}"
-                    amount_img = self.create_text_image(amount_text, 11, 200, 30)
-                    
-                    item_img.save(item_path)
-                    amount_img.save(amount_path)
-                    
-                    c.drawImage(item_path, 35*mm, y_position*mm, width=80*mm, height=6*mm)
-                    c.drawImage(amount_path, 120*mm, y_position*mm, width=55*mm, height=6*mm)
-                    
-                    y_position -= 7
-
-            y_position -= 5
-
-            # 注意事項
-            y_position -= 20
-            notes = [
-                "■ご留意事項",
-                "",
-                "・本書面の金額は、現時点でご提供いただいた資料に基づく概算額でございます。",
-                "・今後の治療経過や後遺障害の認定等により、金額が変動する可能性がございます。",
-                "・ご不明な点やご心配な点がございましたら、担当者までお気軽にご相談ください。",
-                "・お客様の回復と今後の生活再建を第一に考え、誠意を持って対応させていただきます。",
-                "",
-                "なお、本件に関しまして、ご不明な点やご質問等ございましたら、",
-                "担当者まで遠慮なくお申し付けください。",
-                "",
-                "私どもは、お客様の一日も早いご回復を心よりお祈り申し上げております。",
-                "",
-                "敬具"
-            ]
-
-            for note in notes:
-                if note == "":
-                    y_position -= 5
-                    continue
-                
-                is_header = note.startswith("■")
-                temp_path = os.path.join(temp_dir, f"note_{y_position}.png")
-                note_img = self.create_text_image(note, 11, 500, 30, bold=is_header)
-                note_img.save(temp_path)
-                c.drawImage(temp_path, 25*mm, y_position*mm, width=160*mm, height=6*mm)
-                y_position -= 7
-
-            # フッター
-            footer_text = "担当者連絡先：TEL: 03-XXXX-XXXX（平日 9:00-17:00）"
-            footer_img = self.create_text_image(footer_text, 10, 500, 30)
-            footer_path = os.path.join(temp_dir, "footer.png")
-            footer_img.save(footer_path)
-            c.drawImage(footer_path, 25*mm, 15*mm, width=160*mm, height=6*mm)
+            ],
+            "amounts": [
+                (item, f"¥{amount:,}") for item, amount in calculation_data.items() if isinstance(amount, int)
+            ],
+        }
 
-            c.save()
+    def _draw_letter(self, c, content):
+        """1件分のご案内（_letter_content の戻り値）を現在のページに描画
+
+        定型部分はフォームとして参照し、請求ごとに変わる日付・基本情報・金額のみを描画する。
+        """
+        layout = self._static_layout()
+        with span("定型部分"):
+            self._define_static_forms(c, layout)
+        c.doForm(layout["head_form"])
+
+        # 日付
+        self.draw_text(c, content["date"], 10, 200, 20,
+                       130*mm, 270*mm, 60*mm, 5*mm)
+
+        # 基本情報
+        y_position = layout["info_y"]
+        for item in content["info"]:
+            self.draw_text(c, item, 11, 500, 30,
+                           35*mm, y_position*mm, 150*mm, 6*mm)
+            y_position -= 7
+
+        # 金額項目
+        y_position = layout["amount_y"]
+        for item, amount_text in content["amounts"]:
+            self.draw_text(c, item, 11, 300, 30,
+                           35*mm, y_position*mm, 80*mm, 6*mm)
+            self.draw_text(c, amount_text, 11, 200, 30,
+                           120*mm, y_position*mm, 55*mm, 6*mm)
+
+            y_position -= 7
+
+        # 注意事項（金額項目の件数に応じて位置をずらす）
+        y_position -= 25
+        c.saveState()
+        c.translate(0, y_position*mm)
+        c.doForm(layout["notes_form"])
+        c.restoreState()
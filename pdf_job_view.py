@@ -0,0 +1,41 @@
+"""PDF生成ジョブの進捗・結果の表示（app.py と app_change.py で共用）"""
+from datetime import datetime
+
+import streamlit as st
+
+from resources import get_pdf_job_queue
+
+
+@st.fragment(run_every=1)
+def show_pdf_job_progress():
+    """PDF生成ジョブの進捗を表示（完了したら画面全体を再実行してダウンロードボタンを出す）"""
+    status = get_pdf_job_queue().status(st.session_state.pdf_job_id)
+    if status["state"] in ("queued", "running"):
+        label = "PDF生成の順番待ちです" if status["state"] == "queued" else "PDFを生成しています"
+        st.info(f"{label}（{status['elapsed']:.0f}秒経過）")
+    else:
+        st.rerun()
+
+
+def show_pdf_job(diagnostics=None):
+    """PDF生成ジョブの状況に応じて進捗・エラー・ダウンロードボタンを表示
+
+    diagnostics（dict）を指定すると、完了したジョブの段階別の所要時間を "PDF生成" として格納する。
+    """
+    queue = get_pdf_job_queue()
+    status = queue.status(st.session_state.pdf_job_id)
+    if status["state"] in ("queued", "running"):
+        show_pdf_job_progress()
+    elif status["state"] == "done":
+        if diagnostics is not None:
+            diagnostics["PDF生成"] = queue.diagnostics(st.session_state.pdf_job_id)
+        st.download_button(
+            label="PDFをダウンロード",
+            data=queue.result(st.session_state.pdf_job_id),
+            file_name=f"compensation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+            mime="application/pdf"
+        )
+    elif status["state"] == "failed":
+        st.error(f"PDFの生成に失敗しました: {status['error']}")
+    else:
+        st.session_state.pdf_job_id = None
@@ -0,0 +1,163 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+from caching import content_key
+from instrumentation import emit, span, trace
+
+# ワーカープロセスごとに1回だけ作成するPDF生成器と、その準備の所要時間
+_worker_generator = None
+_worker_startup = None
+# 生成したPDFの共有キャッシュ（caching.DiskCache、使わない場合は None）
+_worker_cache = None
+
+
+def _init_worker(text_mode, cache=None):
+    """ワーカープロセスの初期化（フォントの読み込みと定型文の描画を済ませておく）
+
+    PDF関連のモジュール（reportlab・Pillow）はワーカーでのみ読み込む。
+    """
+    global _worker_generator, _worker_startup, _worker_cache
+    _worker_cache = cache
+    with trace("PDFワーカーの起動") as startup:
+        with span("PDFモジュールの読み込み"):
+            from pdf_generator import CompensationPDFGenerator
+        _worker_generator = CompensationPDFGenerator(text_mode=text_mode)
+        _worker_generator.warm_up()
+    _worker_startup = dict(startup.as_dict(), pid=os.getpid())
+
+
+def _startup_report():
+    return _worker_startup
+
+
+def _render(calculation_data, input_data, memory=False, issue_date=None, calculator_fingerprint=None):
+    """PDFを生成し、PDFのバイト列と段階別の所要時間を返す"""
+    issue_date = issue_date or date.today()
+    with trace("PDF生成", memory=memory) as pdf_trace:
+        if _worker_cache is None:
+            pdf_bytes = _worker_generator.generate_pdf(calculation_data, input_data, issue_date=issue_date)
+        else:
+            # 同じ内容・同じ作成日のご案内は、他のセッション・プロセスが生成済みならそれを使う
+            key = content_key(
+                "PDF", _worker_generator.fingerprint(), calculator_fingerprint,
+                issue_date.isoformat(), calculation_data, input_data
+            )
+            pdf_bytes = _worker_cache.get_or_create(
+                key, lambda: _worker_generator.generate_pdf(calculation_data, input_data, issue_date=issue_date)
+            )
+    return pdf_bytes, pdf_trace.as_dict()
+
+
+def _emit_trace(future):
+    """ワーカーで計測したPDF生成のトレースを、このプロセスで登録された送り先に渡す"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    emit(future.result()[1])
+
+
+class PDFJobQueue:
+    """PDF生成のジョブキュー
+
+    生成はワーカープロセスのプールで行い、呼び出し側（Streamlit のスクリプト）は
+    ジョブIDで状況を確認して完了後に結果を受け取る。
+    プールの大きさは接続中のセッション数に関係なく workers で固定する。
+    cache（caching.DiskCache）を指定すると、同じ内容のPDFは生成済みのものを返す。
+    """
+
+    def __init__(self, workers=2, text_mode="raster", max_jobs=256, cache=None):
+        # Streamlit はスレッドを使うため、fork ではなく spawn でワーカーを起動する
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(text_mode, cache)
+        )
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, calculation_data, input_data, memory=False, calculator=None):
+        """PDF生成を依頼してジョブIDを返す（memory=True でメモリ使用量のピークも計測）
+
+        作成日は依頼した日とする。calculator（計算結果を求めた計算機）を指定すると、
+        料率表などが変わった場合に生成済みのPDFを使わない。
+        """
+        job_id = uuid.uuid4().hex
+        fingerprint = calculator.fingerprint() if calculator is not None else None
+        future = self._executor.submit(_render, calculation_data, input_data, memory, date.today(), fingerprint)
+        future.add_done_callback(_emit_trace)
+        with self._lock:
+            self._jobs[job_id] = {"future": future, "submitted": time.monotonic()}
+            self._evict()
+        return job_id
+
+    def _evict(self):
+        """上限を超えたジョブを古い順に破棄（実行中のものは残す）"""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id]["future"].done():
+                del self._jobs[job_id]
+
+    def status(self, job_id):
+        """ジョブの状況（state: queued / running / done / failed / unknown と経過秒数）"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return {"state": "unknown"}
+
+        future = job["future"]
+        elapsed = time.monotonic() - job["submitted"]
+        if not future.done():
+            return {"state": "running" if future.running() else "queued", "elapsed": elapsed}
+        error = future.exception()
+        if error is not None:
+            return {"state": "failed", "elapsed": elapsed, "error": f"{type(error).__name__}: {error}"}
+        return {"state": "done", "elapsed": elapsed}
+
+    def start(self):
+        """ワーカーを起動して準備を始め、各ワーカーの準備の所要時間を返す Future のリストを返す"""
+        futures = [self._executor.submit(_startup_report) for _ in range(self.workers)]
+        reported = set()
+
+        def emit_startup(future):
+            # 同じワーカーが複数回応答した場合も、起動のトレースは1回だけ送る
+            if future.cancelled() or future.exception() is not None:
+                return
+            record = future.result()
+            if record is not None and record["pid"] not in reported:
+                reported.add(record["pid"])
+                emit(record)
+
+        for future in futures:
+            future.add_done_callback(emit_startup)
+        return futures
+
+    def result(self, job_id, timeout=None):
+        """完了したジョブのPDFを取得（未完了なら timeout 秒まで待機）"""
+        with self._lock:
+            job = self._jobs[job_id]
+        return job["future"].result(timeout=timeout)[0]
+
+    def diagnostics(self, job_id, timeout=None):
+        """完了したジョブの段階別の所要時間（instrumentation.Trace.as_dict() の形式）"""
+        with self._lock:
+            job = self._jobs[job_id]
+        return job["future"].result(timeout=timeout)[1]
+
+    def discard(self, job_id):
+        """ジョブを破棄（未開始ならキャンセル）"""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None:
+            job["future"].cancel()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,200 @@
+"""請求ポートフォリオの列指向入出力（Parquet / Arrow IPC）
+
+使い方:
+    python -m portfolio_io convert claims.jsonl portfolio.parquet     # JSONL / CSV から変換
+    python -m portfolio_io calculate portfolio.parquet -o results.parquet
+    python -m portfolio_io calculate portfolio.arrow -o results.parquet --batch-size 100000
+
+列名は一括計算と同じ項目名（"医療費合計", "事故時年齢" など）と登録番号。
+入力はメモリマップで開き、計算に使う列のみをバッチ単位で読むため、
+ファイル全体や1件ごとの dict を作らずに処理できる。
+変換時は読み込めなかった行と必須項目が欠けた請求を除外して報告し、
+計算結果では計算できなかった請求の金額を null、error 列にエラー内容とする。
+"""
+import argparse
+import itertools
+import os
+import sys
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from calculator import RESULT_FIELDS, CompensationCalculator, claims_to_frame
+from claim_io import ID_FIELD, InvalidClaim, claim_id, read_claims
+from claim_record import RECORD_FIELDS, ClaimRecord
+
+# 一括計算で読む列と型（"割引率" は行ごとに割引率を変える場合のみ）
+CALCULATION_SCHEMA = pa.schema(
+    [pa.field(ID_FIELD, pa.string())]
+    + [
+        pa.field(name, {
+            "後遺障害あり": pa.bool_(),
+            "後遺障害等級": pa.string(),
+            "障害の種類": pa.string(),
+            "職種区分": pa.string(),
+        }.get(name, pa.float64()))
+        for _, name in RECORD_FIELDS.values()
+    ]
+    + [pa.field("割引率", pa.float64())]
+)
+
+# 計算できなかった請求は金額を null とし、error にエラー内容を設定する
+RESULT_SCHEMA = pa.schema(
+    [pa.field(ID_FIELD, pa.string())]
+    + [pa.field(name, pa.int64()) for name in RESULT_FIELDS]
+    + [pa.field("error", pa.string())]
+)
+
+
+def detect_format(path):
+    """拡張子からファイル形式（parquet / ipc）を判定"""
+    extension = os.path.splitext(str(path))[1].lower()
+    return "ipc" if extension in (".arrow", ".ipc", ".feather") else "parquet"
+
+
+def iter_batches(path, columns=None, batch_size=65536, format=None):
+    """ポートフォリオを pyarrow.RecordBatch 単位で読み込むジェネレータ
+
+    columns を省略すると一括計算で読む列（CALCULATION_SCHEMA）のうちファイルにあるものに絞る。
+    """
+    format = format or detect_format(path)
+    if columns is None:
+        columns = CALCULATION_SCHEMA.names
+
+    if format == "parquet":
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        available = set(parquet_file.schema_arrow.names)
+        projected = [name for name in columns if name in available]
+        yield from parquet_file.iter_batches(batch_size=batch_size, columns=projected)
+    elif format == "ipc":
+        # IPC ファイルはメモリマップ上のバッファをそのまま参照するため、選ばなかった列は読まれない
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            projected = [name for name in columns if name in reader.schema.names]
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index).select(projected)
+                for offset in range(0, batch.num_rows, batch_size):
+                    yield batch.slice(offset, batch_size)
+    else:
+        raise ValueError(f"不明なファイル形式です: {format}")
+
+
+def _result_batch(frame, results, start):
+    """計算結果（CompensationCalculator.calculate_claims の戻り値）を登録番号付きの RecordBatch に変換"""
+    if ID_FIELD in frame:
+        ids = [
+            claim_id({ID_FIELD: value}, index)
+            for index, value in enumerate(frame[ID_FIELD].tolist(), start)
+        ]
+    else:
+        ids = [f"{index:07d}" for index in range(start, start + len(frame))]
+    arrays = (
+        [pa.array(ids, pa.string())]
+        + [pa.array(results[name], pa.int64(), from_pandas=True) for name in RESULT_FIELDS]
+        + [pa.array(results["error"].tolist(), pa.string())]
+    )
+    return pa.RecordBatch.from_arrays(arrays, schema=RESULT_SCHEMA)
+
+
+def calculate_portfolio(path, output, calculator=None, batch_size=65536, format=None):
+    """ポートフォリオを一括計算し、結果を Parquet で書き出して件数とエラー件数を返す
+
+    入力に不備のある請求を含むバッチは1件ずつ計算し、該当する請求の error にエラー内容を設定する。
+    """
+    calculator = calculator or CompensationCalculator()
+    count = 0
+    errors = 0
+    with pq.ParquetWriter(output, RESULT_SCHEMA) as writer:
+        for batch in iter_batches(path, batch_size=batch_size, format=format):
+            frame = batch.to_pandas()
+            results = calculator.calculate_claims(frame)
+            writer.write_batch(_result_batch(frame, results, count + 1))
+            count += batch.num_rows
+            errors += int(results["error"].notna().sum())
+    return count, errors
+
+
+def claims_to_table(claims, start=1):
+    """入力データ（dict または ClaimRecord）のリストを CALCULATION_SCHEMA の Table に変換"""
+    frame = claims_to_frame(claims)
+    frame[ID_FIELD] = [
+        claim_id(claim, index) if isinstance(claim, dict) else f"{index:07d}"
+        for index, claim in enumerate(claims, start)
+    ]
+    frame = frame.reindex(columns=CALCULATION_SCHEMA.names)
+    return pa.Table.from_pandas(frame, schema=CALCULATION_SCHEMA, preserve_index=False)
+
+
+def write_portfolio(claims, path, chunk_size=65536, format=None):
+    """入力データのイテラブルを順にポートフォリオ（Parquet / Arrow IPC）として書き出し、件数を返す
+
+    書き出すのは一括計算で読む列と登録番号のみ。
+    """
+    format = format or detect_format(path)
+    if format == "parquet":
+        writer = pq.ParquetWriter(path, CALCULATION_SCHEMA)
+    elif format == "ipc":
+        writer = pa.ipc.new_file(path, CALCULATION_SCHEMA)
+    else:
+        raise ValueError(f"不明なファイル形式です: {format}")
+
+    count = 0
+    claims = iter(claims)
+    with writer:
+        while True:
+            chunk = list(itertools.islice(claims, chunk_size))
+            if not chunk:
+                break
+            writer.write_table(claims_to_table(chunk, count + 1))
+            count += len(chunk)
+    return count
+
+
+def valid_claims(claims, invalid):
+    """請求データ（read_claims に errors="yield" を指定したもの）のうち計算できるものを順に返す
+
+    読み込めなかった行と必須項目の欠落・不正な値がある請求は返さず、エラー内容を invalid に追加する。
+    登録番号のない請求には入力の行番号から採番した登録番号を設定する。
+    """
+    for index, claim in enumerate(claims, 1):
+        if isinstance(claim, InvalidClaim):
+            invalid.append(claim.error)
+            continue
+        try:
+            ClaimRecord.from_dict(claim)
+        except Exception as e:
+            invalid.append(f"{index}行目: {type(e).__name__}: {e}")
+            continue
+        yield {**claim, ID_FIELD: claim_id(claim, index)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="請求ポートフォリオ（Parquet / Arrow IPC）の変換と一括計算")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = subparsers.add_parser("convert", help="JSONL / CSV の請求データをポートフォリオに変換")
+    convert_parser.add_argument("input", help="入力ファイル（'-' は標準入力の JSONL）")
+    convert_parser.add_argument("output", help="出力ファイル（.parquet / .arrow）")
+    convert_parser.add_argument("--format", choices=["jsonl", "csv"], help="入力形式（省略時は拡張子から判定）")
+
+    calculate_parser = subparsers.add_parser("calculate", help="ポートフォリオを一括計算して結果を Parquet で出力")
+    calculate_parser.add_argument("input", help="入力ファイル（.parquet / .arrow）")
+    calculate_parser.add_argument("--output", "-o", required=True, help="結果の出力先（Parquet）")
+    calculate_parser.add_argument("--batch-size", type=int, default=65536, help="一括計算する件数")
+
+    args = parser.parse_args(argv)
+    if args.command == "convert":
+        invalid = []
+        count = write_portfolio(valid_claims(read_claims(args.input, args.format, errors="yield"), invalid), args.output)
+        for error in invalid:
+            print(error, file=sys.stderr)
+        print(f"{count}件を変換しました（除外 {len(invalid)}件）", file=sys.stderr)
+        return 1 if invalid else 0
+
+    count, errors = calculate_portfolio(args.input, args.output, batch_size=args.batch_size)
+    print(f"{count}件を計算しました（エラー {errors}件）", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""料率改定時の一括再計算（登録済みの請求を新しい料率表で計算し直し、差額を報告）
+
+使い方:
+    python -m rerating rates_2026.json --report rerating.csv
+    python -m rerating rates_2026.json --report rerating.csv --workers 8 --apply
+
+料率表の設定ファイル（JSON）には CompensationCalculator.from_config のキー
+（discount_rate, disability_rates, nursing_care_rates, leibniz_coefficients）を指定する。
+
+登録番号順にチャンク単位で計算し、請求ごとの旧合計額・新合計額・差額を CSV に、
+後遺障害等級別の集計を <report>.summary.json に書き出す。
+チャンクの処理が済むたびにチェックポイントを保存するため、中断した場合は
+同じコマンドを再実行すると続きから処理する。
+--apply を指定した場合のみ、新しい計算結果で登録済みの計算結果を更新する（既定は報告のみ）。
+"""
+import argparse
+import csv
+import functools
+import json
+import os
+import sys
+
+from calculator import RESULT_FIELDS, CompensationCalculator, shared_calculator
+from claim_store import DEFAULT_DB_PATH, ClaimStore
+from parallel import map_bounded
+
+REPORT_FIELDS = ["登録番号", "後遺障害等級", "旧合計額", "新合計額", "差額", "error"]
+
+CHECKPOINT_VERSION = 1
+
+# 後遺障害なしの請求を集計する区分
+NO_GRADE = "なし"
+
+
+def load_config(path):
+    """料率表の設定ファイル（JSON）を読み込む"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def rerate_chunk(records, config=None):
+    """登録済みの請求（ClaimStore.scan の戻り値）を計算し直し、(報告の行, 新しい計算結果) のリストを返す
+
+    入力に不備のある請求は報告の行に error を設定し、新しい計算結果を None とする。
+    """
+    results = shared_calculator(config).calculate_claims([record["input_data"] for record in records])
+    columns = [results[name].tolist() for name in RESULT_FIELDS]
+
+    rows = []
+    for record, values, error in zip(records, zip(*columns), results["error"]):
+        old_total = (record["results"] or {}).get("合計額")
+        row = {"登録番号": record["登録番号"], "後遺障害等級": record["grade"] or NO_GRADE, "旧合計額": old_total}
+        new = None
+        if error is not None:
+            row["error"] = error
+        else:
+            new = dict(zip(RESULT_FIELDS, values))
+            row["新合計額"] = new["合計額"]
+            if old_total is not None:
+                row["差額"] = new["合計額"] - old_total
+        rows.append((row, new))
+    return rows
+
+
+def _empty_group():
+    return {"件数": 0, "旧合計額": 0, "新合計額": 0, "差額": 0, "増額件数": 0, "減額件数": 0, "エラー件数": 0}
+
+
+def aggregate(summary, row):
+    """報告の1行を後遺障害等級別の集計（{等級: {件数, 旧合計額, ...}}）に加える"""
+    group = summary.setdefault(row["後遺障害等級"], _empty_group())
+    group["件数"] += 1
+    if "error" in row:
+        group["エラー件数"] += 1
+        return
+    group["新合計額"] += row["新合計額"]
+    if "差額" in row:
+        group["旧合計額"] += row["旧合計額"]
+        group["差額"] += row["差額"]
+        group["増額件数"] += row["差額"] > 0
+        group["減額件数"] += row["差額"] < 0
+
+
+def _grade_order(grade):
+    return int(grade.rstrip("級")) if grade != NO_GRADE else 99
+
+
+def summary_table(summary):
+    """等級別の集計に合計行を加え、等級順に並べた {区分: 集計}"""
+    table = {grade: summary[grade] for grade in sorted(summary, key=_grade_order)}
+    total = _empty_group()
+    for group in summary.values():
+        for key, value in group.items():
+            total[key] += value
+    table["合計"] = total
+    return table
+
+
+def _load_checkpoint(path, fingerprint, apply):
+    try:
+        with open(path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"チェックポイントの形式が異なります: {path}")
+    if checkpoint["fingerprint"] != fingerprint or checkpoint["apply"] != apply:
+        raise ValueError(f"チェックポイントは別の料率表・設定で作成されています（--restart で最初からやり直せます）: {path}")
+    return checkpoint
+
+
+def _save_json(path, value):
+    """JSON を一時ファイル経由で置き換えて保存（書き込み中に中断しても壊れない）"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def _scan_chunks(store, after, chunk_size):
+    while True:
+        records = store.scan(after, chunk_size)
+        if not records:
+            return
+        yield records
+        after = records[-1]["登録番号"]
+
+
+def rerate(store, config, report_path, checkpoint_path=None, chunk_size=1000, workers=1,
+           apply=False, restart=False, progress=None):
+    """登録済みの全請求を新しい料率表で計算し直し、等級別の集計を返す
+
+    請求ごとの差額は report_path（CSV）に追記し、チャンクごとにチェックポイント
+    （最後に処理した登録番号と集計）を保存する。チェックポイントがあれば続きから処理する。
+    apply が True の場合は新しい計算結果で登録済みの計算結果を更新する。更新はチャンクの報告と
+    チェックポイント（更新する計算結果を含む）を保存してから行い、更新前に中断した場合は
+    再実行時にチェックポイントから更新し直すため、差額の報告が失われることはない。
+    progress には処理件数を受け取る関数を指定できる。
+    """
+    checkpoint_path = checkpoint_path or f"{report_path}.checkpoint.json"
+    fingerprint = CompensationCalculator.from_config(config).fingerprint()
+    checkpoint = None if restart else _load_checkpoint(checkpoint_path, fingerprint, apply)
+    if checkpoint is None:
+        checkpoint = {
+            "version": CHECKPOINT_VERSION, "fingerprint": fingerprint, "apply": apply,
+            "last": None, "count": 0, "report_size": 0, "summary": {}, "pending": [], "completed": False,
+        }
+    if checkpoint["pending"]:
+        # 前回、報告の保存後・計算結果の更新前に中断したチャンク
+        store.update_results(checkpoint["pending"])
+        checkpoint["pending"] = []
+        _save_json(checkpoint_path, checkpoint)
+
+    if not checkpoint["completed"]:
+        # 前回チェックポイント以降に書き込まれた行は処理し直すため切り捨てる
+        mode = "r+" if checkpoint["report_size"] else "w"
+        with open(report_path, mode, encoding="utf-8", newline="") as f:
+            f.seek(checkpoint["report_size"])
+            f.truncate()
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            if not checkpoint["report_size"]:
+                writer.writeheader()
+
+            chunks = _scan_chunks(store, checkpoint["last"], chunk_size)
+            for rows in map_bounded(functools.partial(rerate_chunk, config=config), chunks, workers):
+                for row, _ in rows:
+                    writer.writerow(row)
+                    aggregate(checkpoint["summary"], row)
+                f.flush()
+                os.fsync(f.fileno())
+                checkpoint["last"] = rows[-1][0]["登録番号"]
+                checkpoint["count"] += len(rows)
+                checkpoint["report_size"] = f.tell()
+                if apply:
+                    checkpoint["pending"] = [(row["登録番号"], new) for row, new in rows if new is not None]
+                _save_json(checkpoint_path, checkpoint)
+                if apply:
+                    store.update_results(checkpoint["pending"])
+                    checkpoint["pending"] = []
+                    _save_json(checkpoint_path, checkpoint)
+                if progress is not None:
+                    progress(checkpoint["count"])
+
+        checkpoint["completed"] = True
+        _save_json(checkpoint_path, checkpoint)
+
+    table = summary_table(checkpoint["summary"])
+    _save_json(f"{os.path.splitext(report_path)[0]}.summary.json", table)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="登録済みの請求を新しい料率表で一括再計算し、差額を報告します")
+    parser.add_argument("config", help="料率表の設定ファイル（JSON）")
+    parser.add_argument("--report", "-o", required=True, help="請求ごとの差額の出力先（CSV）")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="請求データベース")
+    parser.add_argument("--checkpoint", help="チェックポイントファイル（省略時は <report>.checkpoint.json）")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="一括計算する件数")
+    parser.add_argument("--workers", "-w", type=int, default=1, help="計算に使うプロセス数")
+    parser.add_argument("--apply", action="store_true", help="新しい計算結果で登録済みの計算結果を更新する")
+    parser.add_argument("--restart", action="store_true", help="チェックポイントを無視して最初から処理する")
+    args = parser.parse_args(argv)
+
+    store = ClaimStore(args.db)
+    total = store.count()
+    try:
+        table = rerate(
+            store, load_config(args.config), args.report,
+            checkpoint_path=args.checkpoint, chunk_size=args.chunk_size, workers=args.workers,
+            apply=args.apply, restart=args.restart,
+            progress=lambda count: print(f"\r{count}/{total}件", end="", file=sys.stderr)
+        )
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+
+    print("区分\t件数\t旧合計額\t新合計額\t差額\t増額\t減額\tエラー")
+    for grade, group in table.items():
+        print("\t".join(str(value) for value in [
+            grade, group["件数"], group["旧合計額"], group["新合計額"], group["差額"],
+            group["増額件数"], group["減額件数"], group["エラー件数"]
+        ]))
+    return 1 if table["合計"]["エラー件数"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
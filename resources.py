@@ -0,0 +1,74 @@
+import os
+
+import streamlit as st
+
+from instrumentation import span, trace
+
+# 起動直後の最初の実行で計算機とPDFワーカーを準備する（環境変数 SEKISAN_WARM_START=0 で無効化）
+WARM_START = os.environ.get("SEKISAN_WARM_START", "1") != "0"
+
+# 準備の試算に使う入力データ
+WARM_UP_CLAIM = {
+    "基本情報": {"事故時年齢": 40},
+    "職業情報": {},
+    "収入情報": {"基本給": 30, "諸手当": 0},
+    "治療情報": {"入院日数": 0, "通院日数": 0, "医療費合計": 0, "通院交通費合計": 0},
+    "後遺障害情報": {"後遺障害あり": False},
+}
+
+
+@st.cache_resource
+def get_calculator():
+    """再実行・セッションをまたいで共有する計算機（損害項目ごとの差分計算を有効化）"""
+    with span("計算モジュールの読み込み"):
+        from calculator import CompensationCalculator
+    return CompensationCalculator(incremental=True)
+
+
+@st.cache_resource
+def get_claim_store():
+    """請求データの保存先（SQLite、パスは環境変数 SEKISAN_DB_PATH で指定）"""
+    from claim_store import ClaimStore
+    return ClaimStore()
+
+
+@st.cache_resource
+def get_audit_logger():
+    """入力変更の監査ログ（出力先は環境変数 SEKISAN_AUDIT_LOG_DIR で指定）"""
+    from audit_log import AuditLogger
+    return AuditLogger()
+
+
+@st.cache_resource
+def get_disk_cache():
+    """生成したPDFの共有キャッシュ（保存先は SEKISAN_CACHE_DIR、上限は SEKISAN_CACHE_MAX_MB で指定）"""
+    from caching import DiskCache
+    return DiskCache(max_bytes=int(os.environ.get("SEKISAN_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+
+@st.cache_resource
+def get_pdf_job_queue():
+    """PDF生成のジョブキュー（プロセス数は環境変数 SEKISAN_PDF_WORKERS で指定）"""
+    from pdf_jobs import PDFJobQueue
+    return PDFJobQueue(workers=int(os.environ.get("SEKISAN_PDF_WORKERS", "2")), cache=get_disk_cache())
+
+
+@st.cache_resource
+def warm_start():
+    """サーバープロセスで1回だけ、計算機の準備とPDFワーカーの起動を行う
+
+    計算機の準備（pandas などの読み込みと試算）はこの場で行い、
+    PDFワーカーの準備（reportlab・フォントの読み込みと定型文の描画）は待たずに返す。
+    戻り値は {"trace": 所要時間（Trace.as_dict() の形式）, "workers": 各ワーカーの準備の所要時間の Future}。
+    WARM_START が無効なら None。
+    """
+    if not WARM_START:
+        return None
+    with trace("起動") as startup:
+        with span("計算機の準備"):
+            calculator = get_calculator()
+            calculator.calculate_compensation(WARM_UP_CLAIM)
+            calculator.sweep(WARM_UP_CLAIM, {"後遺障害等級": ["14級"]})
+        with span("PDFワーカーの起動"):
+            workers = get_pdf_job_queue().start()
+    return {"trace": startup.as_dict(), "workers": workers}
@@ -0,0 +1,168 @@
+"""不確実な請求の支払備金シミュレーション（モンテカルロ法）
+
+今後の治療予定期間・今後の予想医療費・後遺障害等級などの入力を確率分布で与え、
+1件あたり samples 回の試行を一括計算（calculate_batch）でまとめて計算する。
+
+    from simulation import Discrete, LogNormal, Uniform, simulate_reserve
+
+    reserve = simulate_reserve(input_data, {
+        "今後の治療予定期間": Uniform(1, 6),          # 1〜5年
+        "今後の予想医療費": LogNormal(500000, 0.5),
+        "後遺障害等級": Discrete({"12級": 0.5, "14級": 0.3, None: 0.2}),
+    }, samples=100000, seed=42)
+
+今後の治療予定期間などの整数で扱う項目は計算時に小数点以下を切り捨てるため、
+Uniform(low, high) では high が含まれない（1〜5年とする場合は Uniform(1, 6)）。
+
+試行はチャンクに分けて計算し、チャンクごとに seed から派生させた乱数列を使うため、
+結果は chunk_size が同じであればプロセス数によらず同一になる。
+"""
+import numpy as np
+import pandas as pd
+
+from calculator import RESULT_FIELDS, claims_to_frame, shared_calculator
+from parallel import map_bounded
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class Uniform:
+    """一様分布 [low, high)
+
+    整数で扱う項目（今後の治療予定期間など）は計算時に切り捨てるため、low〜high-1 の整数が等確率になる。
+    """
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def sample(self, rng, size):
+        return rng.uniform(self.low, self.high, size)
+
+
+class Normal:
+    """正規分布（low / high を指定するとその範囲に切り詰める）"""
+
+    def __init__(self, mean, sd, low=None, high=None):
+        self.mean = mean
+        self.sd = sd
+        self.low = low
+        self.high = high
+
+    def sample(self, rng, size):
+        values = rng.normal(self.mean, self.sd, size)
+        if self.low is not None or self.high is not None:
+            values = np.clip(values, self.low, self.high)
+        return values
+
+
+class LogNormal:
+    """対数正規分布（median は中央値、sigma は対数の標準偏差）"""
+
+    def __init__(self, median, sigma):
+        self.median = median
+        self.sigma = sigma
+
+    def sample(self, rng, size):
+        return rng.lognormal(np.log(self.median), self.sigma, size)
+
+
+class Discrete:
+    """離散分布（{値: 確率}、後遺障害等級では None を後遺障害なしとして扱う）"""
+
+    def __init__(self, probabilities):
+        self.values = np.array(list(probabilities), dtype=object)
+        weights = np.array(list(probabilities.values()), dtype=float)
+        self.probabilities = weights / weights.sum()
+
+    def sample(self, rng, size):
+        return self.values[rng.choice(len(self.values), size=size, p=self.probabilities)]
+
+
+def simulate_chunk(input_data, distributions, size, seed, discount_rate=0.05):
+    """1件の請求について size 回の試行を一括計算し、{項目: 試行ごとの金額の配列} を返す
+
+    seed には整数または numpy.random.SeedSequence を渡す。
+    """
+    rng = np.random.default_rng(seed)
+    base = claims_to_frame([input_data]).drop(columns=list(distributions), errors="ignore")
+    claims = base.iloc[np.zeros(size, dtype=np.int64)].reset_index(drop=True)
+    for name, distribution in distributions.items():
+        claims[name] = distribution.sample(rng, size)
+    if "後遺障害等級" in distributions:
+        claims["後遺障害あり"] = claims["後遺障害等級"].notna()
+
+    results = shared_calculator({"discount_rate": discount_rate}).calculate_batch(claims)
+    return {name: results[name].to_numpy() for name in RESULT_FIELDS}
+
+
+def _simulate_task(task):
+    """simulate_chunk の引数のタプルを受け取る（map_bounded 用）"""
+    return simulate_chunk(*task)
+
+
+def _chunk_sizes(samples, chunk_size):
+    return [min(chunk_size, samples - start) for start in range(0, samples, chunk_size)]
+
+
+def summarize(values, percentiles=DEFAULT_PERCENTILES):
+    """試行結果の平均とパーセンタイル（{"平均": ..., "P50": ..., ...}）"""
+    summary = {"平均": float(np.mean(values))}
+    for percentile, value in zip(percentiles, np.percentile(values, percentiles)):
+        summary[f"P{percentile}"] = float(value)
+    return summary
+
+
+def simulate_claims(claims, distributions, samples=10000, seed=0, chunk_size=50000,
+                    workers=1, discount_rate=0.05, percentiles=DEFAULT_PERCENTILES):
+    """複数の請求の支払備金をシミュレーションし、請求ごとの合計額の平均・パーセンタイルを返す
+
+    distributions は全請求共通の {項目名: 分布} か、請求ごとの分布のリスト。
+    戻り値は請求ごとの行と、試行ごとに全請求を合算した「ポートフォリオ合計」の行を持つ DataFrame。
+    workers が2以上の場合はチャンクを複数プロセスに分散する。
+    """
+    claims = list(claims)
+    if isinstance(distributions, dict):
+        distributions = [distributions] * len(claims)
+    if len(distributions) != len(claims):
+        raise ValueError("distributions の数が請求の数と一致しません")
+
+    sizes = _chunk_sizes(samples, chunk_size)
+    seeds = [claim_seed.spawn(len(sizes)) for claim_seed in np.random.SeedSequence(seed).spawn(len(claims))]
+    tasks = (
+        (claim, claim_distributions, size, chunk_seed, discount_rate)
+        for claim, claim_distributions, claim_seeds in zip(claims, distributions, seeds)
+        for size, chunk_seed in zip(sizes, claim_seeds)
+    )
+
+    # 請求ごとの試行結果は集計が済んだら破棄し、保持するのは1件分とポートフォリオ合計のみとする
+    rows = []
+    portfolio_total = np.zeros(samples, dtype=np.int64)
+    claim_chunks = []
+    for chunk in map_bounded(_simulate_task, tasks, workers):
+        claim_chunks.append(chunk["合計額"])
+        if len(claim_chunks) == len(sizes):
+            totals = np.concatenate(claim_chunks)
+            portfolio_total += totals
+            rows.append(summarize(totals, percentiles))
+            claim_chunks = []
+    rows.append(summarize(portfolio_total, percentiles))
+    return pd.DataFrame(rows, index=list(range(len(claims))) + ["ポートフォリオ合計"])
+
+
+def simulate_reserve(input_data, distributions, samples=10000, seed=0, chunk_size=50000,
+                     workers=1, discount_rate=0.05, percentiles=DEFAULT_PERCENTILES):
+    """1件の請求の支払備金をシミュレーションし、損害項目ごとの平均・パーセンタイルを返す
+
+    戻り値は損害項目（治療関係費・後遺障害逸失利益・合計額）を行、
+    平均と P50 / P90 / P99 を列に持つ DataFrame。
+    """
+    sizes = _chunk_sizes(samples, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(input_data, distributions, size, chunk_seed, discount_rate) for size, chunk_seed in zip(sizes, seeds)]
+
+    chunks = list(map_bounded(_simulate_task, tasks, workers))
+    return pd.DataFrame(
+        [summarize(np.concatenate([chunk[name] for chunk in chunks]), percentiles) for name in RESULT_FIELDS],
+        index=RESULT_FIELDS
+    )